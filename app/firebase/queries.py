@@ -0,0 +1,140 @@
+# Registry of every Firestore query the app issues.
+# Routes build their queries through `build_query` so this list stays complete.
+# scripts/firestore_indexes.py turns it into firestore.indexes.json and checks
+# it (statically, and against the emulator / a project when one is configured).
+import os
+import json
+from dataclasses import dataclass, field
+from typing import Dict, Tuple
+
+from app.firebase.firebase_config import db
+
+MANIFEST_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "firestore.indexes.json")
+
+EQUALITY_OPS = {"==", "in"}
+ARRAY_OPS = {"array_contains", "array_contains_any"}
+
+
+@dataclass(frozen=True)
+class QuerySpec:
+    name: str
+    collection: str
+    filters: Tuple[Tuple[str, str], ...]             # (field, op)
+    order_by: Tuple[Tuple[str, str], ...] = ()       # (field, "ASCENDING" | "DESCENDING")
+    sample: Dict[str, object] = field(default_factory=dict)   # values used by the index check
+    used_by: str = ""
+
+
+QUERIES: Dict[str, QuerySpec] = {}
+
+
+def register(spec: QuerySpec) -> QuerySpec:
+    QUERIES[spec.name] = spec
+    return spec
+
+
+register(QuerySpec(
+    name="folders_by_owner",
+    collection="folders",
+    filters=(("createdBy", "=="),),
+    used_by="GET /folders, GET /dashboard, PUT /users/me/interests, GET /users/me/export",
+))
+register(QuerySpec(
+    name="users_by_email",
+    collection="users",
+    filters=(("email", "=="),),
+    sample={"email": "index-check@example.com"},
+    used_by="POST /register, POST /login",
+))
+register(QuerySpec(
+    name="flagged_report_counts",
+    collection="report_counts",
+    filters=(("flagged", "=="),),
+    sample={"flagged": True},
+    used_by="GET /games/flagged",
+))
+register(QuerySpec(
+    name="llm_usage_since",
+    collection="llm_usage_daily",
+    filters=(("date", ">="),),
+    sample={"date": "2000-01-01"},
+    used_by="GET /admin/llm-usage",
+))
+register(QuerySpec(
+    name="llm_usage_by_user_since",
+    collection="llm_usage_daily",
+    filters=(("userId", "=="), ("date", ">=")),
+    sample={"date": "2000-01-01"},
+    used_by="GET /admin/llm-usage?userId=",
+))
+
+
+def paginate(query, page_size: int = 200):
+    """Yield a query's documents page by page (ordered by id) to keep memory bounded."""
+    query = query.order_by("__name__")
+    last = None
+    while True:
+        page = (query.start_after(last) if last is not None else query).limit(page_size).get()
+        yield from page
+        if len(page) < page_size:
+            return
+        last = page[-1]
+
+
+def build_query(name: str, **values):
+    """Build a registered query; `values` maps each filtered field to its value."""
+    spec = QUERIES[name]
+    query = db.collection(spec.collection)
+    for field_path, op in spec.filters:
+        query = query.where(field_path, op, values[field_path])
+    for field_path, direction in spec.order_by:
+        query = query.order_by(field_path, direction=direction)
+    return query
+
+
+# ---------------------------
+# Index planning
+# ---------------------------
+def required_index(spec: QuerySpec):
+    """
+    The composite index a query needs, or None when Firestore's automatic
+    single-field indexes are enough (one field, or equality filters only).
+    """
+    equality = [f for f, op in spec.filters if op in EQUALITY_OPS]
+    arrays = [f for f, op in spec.filters if op in ARRAY_OPS]
+    ranges = [f for f, op in spec.filters if op not in EQUALITY_OPS | ARRAY_OPS]
+    orders = [(f, d) for f, d in spec.order_by if f != "__name__"]
+
+    fields = set(equality) | set(arrays) | set(ranges) | {f for f, _ in orders}
+    if len(fields) <= 1 or (not ranges and not orders and not arrays):
+        return None
+
+    index_fields = [{"fieldPath": f, "order": "ASCENDING"} for f in dict.fromkeys(equality)]
+    index_fields += [{"fieldPath": f, "arrayConfig": "CONTAINS"} for f in arrays]
+    ordered = list(orders)
+    # A range filter's field must lead the ordering
+    for f in ranges:
+        if f not in {o for o, _ in ordered}:
+            ordered.insert(0, (f, "ASCENDING"))
+    index_fields += [{"fieldPath": f, "order": d} for f, d in ordered if f not in equality]
+
+    return {"collectionGroup": spec.collection, "queryScope": "COLLECTION", "fields": index_fields}
+
+
+def index_manifest() -> dict:
+    indexes = []
+    for spec in QUERIES.values():
+        index = required_index(spec)
+        if index is not None and index not in indexes:
+            indexes.append(index)
+    return {"indexes": indexes, "fieldOverrides": []}
+
+
+def missing_indexes(manifest_path: str = MANIFEST_PATH) -> list:
+    """Composite indexes the registered queries need that the manifest lacks."""
+    try:
+        with open(manifest_path) as f:
+            declared = json.load(f).get("indexes", [])
+    except FileNotFoundError:
+        declared = []
+    return [i for i in index_manifest()["indexes"] if i not in declared]
@@ -1,5 +1,6 @@
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from brotli_asgi import BrotliMiddleware
 from fastapi.openapi.utils import get_openapi
 from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse
@@ -9,19 +10,58 @@ from app.routes.folder_routes import router as folder_router
 from app.routes.game_routes import router as game_router
 from app.routes.ai_routes import router as ai_router
 from app.routes.dashboard_routes import router as dashboard_router
+from app.routes.export_routes import router as export_router
+from app.routes.review_routes import router as review_router
+from app.routes.admin_routes import router as admin_router
 from app.firebase.firebase_config import db
 from app.routes import progress_routes
+from app.services.openai_client import init_client, close_client
+from app.services.reports import report_writer
+from app.services.llm_ledger import ledger_writer
+from app.firebase.queries import missing_indexes
+from app.utils.serialization import AppJSONResponse
 
 from dotenv import load_dotenv
+from contextlib import asynccontextmanager
+from anyio import to_thread
 import logging
 import sys
+import os
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
 
 load_dotenv()
 
-app = FastAPI()
+# Responses smaller than this are sent uncompressed
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+# Sync routes run in anyio's threadpool and mostly wait on Firestore / OpenAI
+THREADPOOL_SIZE = int(os.getenv("THREADPOOL_SIZE", "100"))
+
+
+# ---------------------------
+# LIFESPAN (shared clients)
+# ---------------------------
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Refuse to start if a registered query needs an index the manifest lacks
+    if os.getenv("FIRESTORE_INDEX_CHECK") == "1":
+        missing = missing_indexes()
+        if missing:
+            raise RuntimeError(f"firestore.indexes.json is missing indexes: {missing}")
+    to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+    # One pooled OpenAI client for the whole app
+    app.state.openai = init_client()
+    # Background batch writer for game reports
+    report_writer.start()
+    ledger_writer.start()
+    yield
+    ledger_writer.stop()
+    report_writer.stop()
+    close_client()
+
+
+app = FastAPI(lifespan=lifespan, default_response_class=AppJSONResponse)
 
 # Allow CORS for frontend development
 app.add_middleware(
@@ -32,6 +72,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Brotli when the client accepts it, gzip otherwise
+app.add_middleware(
+    BrotliMiddleware,
+    minimum_size=COMPRESSION_MIN_SIZE,
+    gzip_fallback=True,
+)
+
 # ---------------------------
 # GLOBAL VALIDATION HANDLER
 # ---------------------------
@@ -54,6 +101,9 @@ app.include_router(game_router)
 app.include_router(ai_router)
 app.include_router(dashboard_router)
 app.include_router(progress_routes.router)
+app.include_router(export_router)
+app.include_router(review_router)
+app.include_router(admin_router)
 
 
 
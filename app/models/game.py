@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 from datetime import datetime
 from typing import List, Optional
 
@@ -15,3 +15,21 @@ class Game(BaseModel):
     folderId: Optional[str] = None   # can be "random" for trivia
     topic: Optional[str] = None      # keep optional for safety
     tags: List[str] = Field(default_factory=list)
+
+
+class GeneratedGame(BaseModel):
+    """
+    The part of a Game the LLM produces, before ids, order and timestamps
+    are assigned. Used to validate generated output one game at a time.
+    """
+    question: str = Field(..., min_length=1)
+    options: List[str] = Field(..., min_length=4, max_length=4)
+    correctAnswer: str
+    explanation: str = ""
+    topic: Optional[str] = None
+
+    @model_validator(mode="after")
+    def correct_answer_in_options(self):
+        if self.correctAnswer not in self.options:
+            raise ValueError("correctAnswer must be one of the options")
+        return self
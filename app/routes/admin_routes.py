@@ -0,0 +1,18 @@
+from fastapi import APIRouter, Depends, Query
+from typing import Optional
+
+from app.models.user_model import User
+from app.utils.auth import require_admin
+from app.services.llm_ledger import usage_summary
+
+router = APIRouter(prefix="/admin", tags=["Admin"])
+
+
+# 📌 LLM cost / latency summary (by day, user, mode, model, difficulty) from the daily rollups
+@router.get("/llm-usage")
+def get_llm_usage(
+    days: int = Query(7, ge=1, le=90),
+    userId: Optional[str] = None,
+    user: User = Depends(require_admin),
+):
+    return usage_summary(days, userId)
@@ -1,21 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, Body
+from fastapi import APIRouter, Depends, HTTPException, Body, Header, Query
+from typing import Optional
 from app.models.user_model import User
-from app.utils.auth import get_current_user
+from app.utils.auth import get_current_user, require_admin
 from app.firebase.firebase_config import db
 from uuid import uuid4
 from google.cloud import firestore
-from dotenv import load_dotenv
-import os
 from datetime import datetime
 
 from app.services.generation import generate_games_from_prompt
 from app.services.normalization import normalize_topic
+from app.services.dedup import get_folder_index, drop_duplicates
+from app.services.difficulty import score, get_progress
+from app.services.llm_ledger import record_folder_generation, usage_summary
 from app.models.game import Game
-
-# Load .env and OpenAI key
-load_dotenv()
-import openai
-openai.api_key = os.getenv("OPENAI_API_KEY")
+from app.utils.idempotency import idempotency_store, scoped_key
 
 router = APIRouter(prefix="/ai", tags=["AI"])
 
@@ -24,6 +22,9 @@ router = APIRouter(prefix="/ai", tags=["AI"])
 # -------------------------------
 DURATION_TO_COUNT = {5: 3, 10: 6, 15: 8}
 
+# Extra generation rounds to replace near-duplicate questions
+DEDUP_MAX_REFILLS = 2
+
 def questions_from_duration(duration: int) -> int:
     if duration not in DURATION_TO_COUNT:
         raise HTTPException(
@@ -39,9 +40,18 @@ def questions_from_duration(duration: int) -> int:
 def generate_from_existing_folder(
     folder_id: str,
     duration: int = Body(5, embed=True),
-    difficulty: str = Body("same", embed=True),  # 👈 new parameter
-    user: User = Depends(get_current_user)
+    difficulty: str = Body("same", embed=True),  # same | easier | harder | auto
+    user: User = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None),
 ):
+    # A retried request with the same Idempotency-Key gets the first result back
+    key = scoped_key(user.id, f"generate:{folder_id}", idempotency_key)
+    return idempotency_store.run(
+        key, lambda: _generate_for_folder(folder_id, duration, difficulty, user)
+    )
+
+
+def _generate_for_folder(folder_id: str, duration: int, difficulty: str, user: User):
     folder_ref = db.collection("folders").document(folder_id).get()
     if not folder_ref.exists:
         raise HTTPException(status_code=404, detail="Folder not found")
@@ -53,6 +63,10 @@ def generate_from_existing_folder(
     prompt = folder.get("prompt", "General knowledge")
     num_questions = questions_from_duration(duration)
 
+    # 🔹 "auto" → let the difficulty engine decide from the user's progress
+    if difficulty == "auto":
+        difficulty = score(get_progress(user.id, folder_id))["difficulty"]
+
     # 🔹 Adjust prompt depending on difficulty
     if difficulty == "easier":
         prompt += " (make the questions easier, suitable for beginners)"
@@ -60,53 +74,75 @@ def generate_from_existing_folder(
         prompt += " (make the questions more challenging, advanced vocabulary and harder questions)"
     # "same" → no change
 
+    # 🔹 Drop questions that near-duplicate the folder's games (or ones a concurrent
+    # request is saving), ask for replacements. Kept games stay reserved until saved.
+    index = get_folder_index(folder_id, folder.get("gameIds", []))
+    fresh, avoid, skipped = [], [], 0
     try:
-        raw_games = generate_games_from_prompt(prompt, count=num_questions)
+        for _ in range(1 + DEDUP_MAX_REFILLS):
+            raw_games = generate_games_from_prompt(
+                prompt, count=num_questions - len(fresh), difficulty=difficulty, avoid=avoid, user_id=user.id
+            )
+            new, duplicates = drop_duplicates(index, raw_games)
+            fresh.extend(new)
+            skipped += len(duplicates)
+            if len(fresh) >= num_questions or not duplicates:
+                break
+            print(f"⚠️ Dropped {len(duplicates)} duplicate questions, requesting replacements")
+            avoid += [g["question"] for g in duplicates]
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"GPT call failed: {str(e)}")
+        if not fresh:
+            raise HTTPException(status_code=500, detail=f"GPT call failed: {str(e)}")
+    finally:
+        record_folder_generation(user.id, folder_id, difficulty, num_questions, len(fresh), skipped)
 
+    # Games are already validated against GeneratedGame by the generation service
     saved_games = []
-    for i, g in enumerate(raw_games):
-        q = g.get("question")
-        options = g.get("options", [])
-        correct = g.get("correctAnswer")
-        explanation = g.get("explanation")
-        topic = g.get("topic", prompt)
-
-        if not q or not isinstance(options, list) or len(options) != 4:
-            print("⚠️ Skipping invalid game:", g)
-            continue
-        if correct not in options:
-            print("⚠️ Correct answer not in options, fixing:", correct)
-            correct = options[0]
-
-        game_id = str(uuid4())
-        created_at = datetime.utcnow()
-
-        main_topic = normalize_topic(topic, fallback=prompt)
-        tags = [topic] if topic else []
-
-        game_data = {
-            "id": game_id,
-            "order": i + 1,
-            "title": q[:30],
-            "question": q,
-            "options": options,
-            "correctAnswer": correct,
-            "explanation": explanation or "",
-            "createdAt": created_at,
-            "createdBy": user.id,
-            "folderId": folder_id,
-            "topic": main_topic,
-            "tags": tags,
-            "difficulty": difficulty,  # 👈 store difficulty info
-        }
-
-        db.collection("games").document(game_id).set(game_data)
-        db.collection("folders").document(folder_id).update({
-            "gameIds": firestore.ArrayUnion([game_id])
-        })
-
-        saved_games.append(game_data)
+    try:
+        for i, (g, token) in enumerate(fresh):
+            q = g["question"]
+            topic = g.get("topic", prompt)
+
+            game_id = str(uuid4())
+            created_at = datetime.utcnow()
+
+            main_topic = normalize_topic(topic, fallback=prompt)
+            tags = [topic] if topic else []
+
+            game_data = {
+                "id": game_id,
+                "order": i + 1,
+                "title": q[:30],
+                "question": q,
+                "options": g["options"],
+                "correctAnswer": g["correctAnswer"],
+                "explanation": g["explanation"],
+                "createdAt": created_at,
+                "createdBy": user.id,
+                "folderId": folder_id,
+                "topic": main_topic,
+                "tags": tags,
+                "difficulty": difficulty,  # 👈 store difficulty info
+            }
+
+            db.collection("games").document(game_id).set(game_data)
+            db.collection("folders").document(folder_id).update({
+                "gameIds": firestore.ArrayUnion([game_id])
+            })
+            index.commit(token, game_id)
+
+            saved_games.append(game_data)
+    finally:
+        # Unsaved reservations would block these questions for other requests
+        index.release(token for _, token in fresh)
 
     return saved_games
+
+
+# -------------------------------
+# Generation stats per mode (admin)
+# -------------------------------
+# Read from the LLM ledger rollups so every worker reports the same numbers
+@router.get("/generation-stats")
+def get_generation_stats(days: int = Query(7, ge=1, le=90), user: User = Depends(require_admin)):
+    return usage_summary(days)["byMode"]
@@ -2,6 +2,10 @@ from fastapi import APIRouter, Depends, HTTPException
 from app.models.user_model import User
 from app.utils.auth import get_current_user
 from app.firebase.firebase_config import db
+from app.firebase.queries import build_query
+from app.utils.serialization import AppJSONResponse, to_iso
+from app.services.difficulty import score_all_folders
+from datetime import datetime
 
 router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
 
@@ -15,26 +19,20 @@ def get_dashboard(current_user: User = Depends(get_current_user)):
     user_data = user_doc.to_dict()
     user_data["id"] = current_user.id
 
-    q = db.collection("folders").where("createdBy", "==", current_user.id).stream()
+    # Accuracy / suggested difficulty for every folder, one pass over progress
+    scores = score_all_folders(current_user.id)
+
+    q = build_query("folders_by_owner", createdBy=current_user.id).stream()
     folders = []
     for doc in q:
         f = doc.to_dict()
         f["id"] = doc.id
-
-        created_at = f.get("createdAt")
-        if hasattr(created_at, "isoformat"):
-            f["createdAt"] = created_at.isoformat()
-        elif isinstance(created_at, dict) and created_at.get("_seconds"):
-            from datetime import datetime
-            f["createdAt"] = datetime.fromtimestamp(created_at["_seconds"]).isoformat()
-        elif created_at is None:
-            from datetime import datetime
-            f["createdAt"] = datetime.utcnow().isoformat()
-
+        f["createdAt"] = to_iso(f.get("createdAt"), default=datetime.utcnow().isoformat())
         f.setdefault("gameIds", [])
+        f["score"] = scores.get(doc.id)
 
         folders.append(f)
 
     print("folders count:", len(folders))
-    return {"user": user_data, "folders": folders}
+    return AppJSONResponse({"user": user_data, "folders": folders})
 
@@ -0,0 +1,98 @@
+import zlib
+import tempfile
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+
+from app.firebase.firebase_config import db
+from app.models.user_model import User
+from app.utils.auth import get_current_user
+from app.services.export import export_folder, export_user, gzip_stream, ImportWriter
+
+router = APIRouter(tags=["Export"])
+
+GZIP_MAGIC = b"\x1f\x8b"
+# Validated import bodies are held in memory up to this size, then on disk
+IMPORT_SPOOL_MEMORY = 8 * 1024 * 1024
+
+
+def _stream(records, filename: str, gzip: bool) -> StreamingResponse:
+    # Sync generators are iterated in the threadpool, so Firestore reads don't block the loop
+    if gzip:
+        return StreamingResponse(
+            gzip_stream(records),
+            media_type="application/gzip",
+            # "identity" makes the compression middleware leave the already-gzipped body alone
+            headers={
+                "Content-Disposition": f'attachment; filename="{filename}.ndjson.gz"',
+                "Content-Encoding": "identity",
+            },
+        )
+    return StreamingResponse(
+        records,
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}.ndjson"'},
+    )
+
+
+# 📌 Export one folder (folder, games, progress) as NDJSON
+@router.get("/folders/{folder_id}/export")
+def export_one_folder(folder_id: str, gzip: bool = False, current_user: User = Depends(get_current_user)):
+    folder_doc = db.collection("folders").document(folder_id).get()
+    if not folder_doc.exists:
+        raise HTTPException(status_code=404, detail="Folder not found")
+
+    folder = {**folder_doc.to_dict(), "id": folder_id}
+    if folder.get("createdBy") != current_user.id:
+        raise HTTPException(status_code=403, detail="Unauthorized")
+
+    return _stream(export_folder(current_user.id, folder), f"folder-{folder_id}", gzip)
+
+
+# 📌 Export everything the user owns
+@router.get("/users/me/export")
+def export_me(gzip: bool = False, current_user: User = Depends(get_current_user)):
+    return _stream(export_user(current_user.id), f"export-{current_user.id}", gzip)
+
+
+# 📌 Import an export (plain or gzipped NDJSON body) into the current user's account
+# The whole body is validated before the first write, so a bad line imports nothing
+@router.post("/folders/import")
+async def import_folders(request: Request, current_user: User = Depends(get_current_user)):
+    check = ImportWriter(current_user.id, dry_run=True)
+    spool = tempfile.SpooledTemporaryFile(max_size=IMPORT_SPOOL_MEMORY)
+    decompressor = None
+    buffer = b""
+    first = True
+
+    def accept(line: bytes):
+        check.add_line(line)
+        spool.write(line.strip() + b"\n")
+
+    try:
+        try:
+            async for chunk in request.stream():
+                if first and chunk:
+                    first = False
+                    if chunk.startswith(GZIP_MAGIC):
+                        decompressor = zlib.decompressobj(31)
+                if decompressor is not None:
+                    chunk = decompressor.decompress(chunk)
+                buffer += chunk
+
+                *lines, buffer = buffer.split(b"\n")
+                for line in lines:
+                    accept(line)
+
+            if decompressor is not None:
+                buffer += decompressor.flush()
+            accept(buffer)
+        except (ValueError, KeyError, TypeError, AttributeError, zlib.error) as e:
+            raise HTTPException(status_code=400, detail=f"Invalid export file: {e}")
+
+        spool.seek(0)
+        writer = ImportWriter(current_user.id)
+        await run_in_threadpool(writer.write_all, spool)
+        return {"success": True, **writer.counts}
+    finally:
+        spool.close()
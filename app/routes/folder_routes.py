@@ -1,8 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException, Body
 from app.firebase.firebase_config import db
+from app.firebase.queries import build_query
 from app.models.folder import Folder, FolderCreate
 from app.models.user_model import User
 from app.utils.auth import get_current_user
+from app.utils.serialization import AppJSONResponse, to_iso
+from app.services.dedup import forget_folder
+from app.services.cache import game_cache, get_game_docs
 from typing import List
 from datetime import datetime
 from uuid import uuid4
@@ -33,14 +37,12 @@ def create_folder(folder: FolderCreate, current_user: User = Depends(get_current
 # 📌 List user’s folders
 @router.get("/", response_model=List[Folder])
 def list_folders(current_user: User = Depends(get_current_user)):
-    folders_ref = db.collection("folders").where("createdBy", "==", current_user.id).stream()
+    folders_ref = build_query("folders_by_owner", createdBy=current_user.id).stream()
     folders = []
     for doc in folders_ref:
         folder_data = doc.to_dict()
         folder_data["id"] = doc.id
-        created_at = folder_data.get("createdAt")
-        if hasattr(created_at, "isoformat"):
-            folder_data["createdAt"] = created_at.isoformat()
+        folder_data["createdAt"] = to_iso(folder_data.get("createdAt"))
         folders.append(Folder(**folder_data))
     return folders
 
@@ -58,23 +60,19 @@ def get_folder_with_games(folder_id: str, current_user: User = Depends(get_curre
     if folder_data.get("createdBy") != current_user.id:
         raise HTTPException(status_code=403, detail="Unauthorized")
 
+    # Cached games + one batched read for the rest, kept in folder order
     game_ids = folder_data.get("gameIds", [])
+    found = get_game_docs(game_ids)
     games = []
     for game_id in game_ids:
-        game_doc = db.collection("games").document(game_id).get()
-        if game_doc.exists:
-            game = game_doc.to_dict()
-            game["id"] = game_doc.id
-            created_at = game.get("createdAt")
-            if hasattr(created_at, "isoformat"):
-                game["createdAt"] = created_at.isoformat()
-            games.append(game)
+        game = found.get(game_id)
+        # 🚩 Skip games auto-flagged by player reports
+        if game is None or game.get("flagged"):
+            continue
+        games.append(game)
 
-    created_at = folder_data.get("createdAt")
-    if hasattr(created_at, "isoformat"):
-        folder_data["createdAt"] = created_at.isoformat()
-
-    return {"folder": folder_data, "games": games}
+    # Datetimes are serialized by AppJSONResponse; returning it directly skips jsonable_encoder
+    return AppJSONResponse({"folder": folder_data, "games": games})
 
 
 # 📌 Update (rename / edit) a folder
@@ -110,8 +108,10 @@ def delete_folder(folder_id: str, current_user: User = Depends(get_current_user)
     # Delete games inside folder
     for game_id in folder_data.get("gameIds", []):
         db.collection("games").document(game_id).delete()
+        game_cache.invalidate(game_id)
 
     # Delete folder itself
     folder_ref.delete()
+    forget_folder(folder_id)
 
     return {"success": True, "message": "Folder and its games deleted"}
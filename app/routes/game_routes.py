@@ -1,37 +1,40 @@
 from fastapi import APIRouter, Depends, HTTPException
 from app.models.game import Game
 from app.models.user_model import User
-from app.utils.auth import get_current_user
-from app.firebase.firebase_config import db
-from google.cloud import firestore
-from uuid import uuid4
+from app.utils.auth import get_current_user, require_admin, can_view_game
+from app.utils.serialization import to_datetime
+from app.services.reports import enqueue_report, list_flagged_games, report_doc_id
+from app.services.cache import get_game_doc
 from datetime import datetime
 from typing import List
 
 router = APIRouter(prefix="/games", tags=["Games"])
 
 
+# 📌 Moderation: games auto-flagged by reports (declared before /{game_id})
+@router.get("/flagged")
+def get_flagged_games(limit: int = 100, user: User = Depends(require_admin)):
+    return list_flagged_games(limit)
+
+
 @router.get("/{game_id}", response_model=Game)
 def get_game_by_id(game_id: str, user: User = Depends(get_current_user)):
     try:
-        doc = db.collection("games").document(game_id).get()
-        if not doc.exists:
+        data = get_game_doc(game_id)
+        if data is None:
             raise HTTPException(status_code=404, detail="Game not found")
 
-        data = doc.to_dict()
-        data["id"] = doc.id
-
         # ✅ Allow access if it's a "random trivia" game
         if data.get("folderId") != "random":
             if data["createdBy"] != user.id:
                 raise HTTPException(status_code=403, detail="Unauthorized")
+        # 🚩 Flagged trivia is pulled from the shared pool (owners can still open it)
+        elif data.get("flagged") and data.get("createdBy") != user.id:
+            raise HTTPException(status_code=404, detail="Game not found")
 
         # Normalize createdAt
         if "createdAt" in data:
-            if hasattr(data["createdAt"], "to_datetime"):
-                data["createdAt"] = data["createdAt"].to_datetime()
-            elif isinstance(data["createdAt"], str):
-                data["createdAt"] = datetime.fromisoformat(data["createdAt"])
+            data["createdAt"] = to_datetime(data["createdAt"])
 
         return Game(**data)
 
@@ -42,27 +45,32 @@ def get_game_by_id(game_id: str, user: User = Depends(get_current_user)):
         raise HTTPException(status_code=500, detail="Internal server error")
 
 @router.post("/{game_id}/report")
-def report_game_issue(game_id: str, payload: dict, current_user: dict = Depends(get_current_user)):
+def report_game_issue(game_id: str, payload: dict, current_user: User = Depends(get_current_user)):
         """
         Report an issue with a game (wrong answer, no correct option, etc.).
-        Saves report in Firestore under 'reports'.
+        Queued and written to Firestore under 'reports' in batches.
+        Each user counts once per game towards auto-flagging.
         """
         folder_id = payload.get("folderId")
         if not folder_id:
             raise HTTPException(status_code=400, detail="Missing folderId")
 
-        report_id = str(uuid4())
+        game = get_game_doc(game_id)
+        if game is None or not can_view_game(game, current_user.id):
+            raise HTTPException(status_code=404, detail="Game not found")
+
+        report_id = report_doc_id(game_id, current_user.id)
         report_data = {
             "id": report_id,
             "gameId": game_id,
             "folderId": folder_id,
-            "userId": current_user["id"],
+            "userId": current_user.id,
             "question": payload.get("question"),
             "selectedAnswer": payload.get("selectedAnswer"),
             "correctAnswer": payload.get("correctAnswer"),
             "createdAt": datetime.utcnow().isoformat(),
         }
 
-        db.collection("reports").document(report_id).set(report_data)
+        enqueue_report(report_data)
 
         return {"status": "ok", "reportId": report_id}
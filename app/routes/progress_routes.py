@@ -1,8 +1,13 @@
 # app/routes/progress_routes.py
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException
 from app.firebase.firebase_config import db
-from app.utils.auth import get_current_user
-from fastapi import Body
+from app.utils.auth import get_current_user, can_view_game
+from fastapi import Body, Header
+from typing import Optional
+from app.utils.idempotency import idempotency_store, scoped_key
+from app.services.difficulty import update_stats, stats_from_played, score, pick_games, get_progress
+from app.services.review import record_review
+from app.services.cache import get_game_doc
 from pydantic import BaseModel
 from datetime import datetime
 
@@ -19,16 +24,34 @@ def mark_game_progress(
     folder_id: str,
     game_id: str,
     body: ProgressBody = Body(...),
-    current_user=Depends(get_current_user)
+    current_user=Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None),
 ):
-    user_id = current_user.id
+    # Only games the caller can see, in the folder they claim, enter their progress and review queue
+    game = get_game_doc(game_id)
+    if game is None or game.get("folderId") != folder_id or not can_view_game(game, current_user.id):
+        raise HTTPException(status_code=404, detail="Game not found")
+
+    key = scoped_key(current_user.id, f"progress:{folder_id}:{game_id}", idempotency_key)
+    return idempotency_store.run(
+        key, lambda: _save_progress(current_user.id, folder_id, game_id, body.correct)
+    )
+
+
+def _save_progress(user_id: str, folder_id: str, game_id: str, correct: bool):
     doc_ref = db.collection("users").document(user_id).collection("progress").document(folder_id)
 
     doc = doc_ref.get()
     data = doc.to_dict() if doc.exists else {"playedGames": {}, "strike": 0}
 
     played = data.get("playedGames", {})
-    played[game_id] = {"correct": body.correct, "answeredAt": datetime.utcnow().isoformat()}
+    answered_at = datetime.utcnow().isoformat()
+
+    # Aggregates for the difficulty engine, updated in place (backfilled once for old docs)
+    stats = data.get("stats") or stats_from_played(played)
+    data["stats"] = update_stats(stats, played.get(game_id), correct, answered_at)
+
+    played[game_id] = {"correct": correct, "answeredAt": answered_at}
 
     # streak logic
     today = datetime.utcnow().date()
@@ -43,6 +66,9 @@ def mark_game_progress(
     data["playedGames"] = played
 
     doc_ref.set(data)
+
+    # Reschedule the game in the user's spaced-repetition queue
+    record_review(user_id, folder_id, game_id, correct)
     return {"success": True, "progress": data}
 
 
@@ -52,3 +78,22 @@ def get_folder_progress(folder_id: str, current_user=Depends(get_current_user)):
     doc_ref = db.collection("users").document(user_id).collection("progress").document(folder_id)
     doc = doc_ref.get()
     return doc.to_dict() if doc.exists else {"playedGames": {}, "strike": 0}
+
+
+@router.get("/{folder_id}/plan")
+def get_folder_plan(folder_id: str, n: int = 5, current_user=Depends(get_current_user)):
+    """
+    Suggested difficulty for the folder plus which existing games to serve
+    next (missed first, then unplayed). `toGenerate` is how many new games
+    are still needed to reach n.
+    """
+    folder_doc = db.collection("folders").document(folder_id).get()
+    if not folder_doc.exists:
+        raise HTTPException(status_code=404, detail="Folder not found")
+    folder = folder_doc.to_dict()
+    if folder.get("createdBy") != current_user.id:
+        raise HTTPException(status_code=403, detail="Unauthorized")
+
+    progress = get_progress(current_user.id, folder_id)
+    game_ids = pick_games(progress, folder.get("gameIds", []), n)
+    return {**score(progress), "gameIds": game_ids, "toGenerate": max(0, n - len(game_ids))}
@@ -0,0 +1,36 @@
+from fastapi import APIRouter, Depends, Query
+
+from app.models.user_model import User
+from app.utils.auth import get_current_user, can_view_game
+from app.services.review import due_games, forget_games
+from app.services.cache import get_game_docs
+from app.utils.serialization import AppJSONResponse
+
+router = APIRouter(prefix="/review", tags=["Review"])
+
+# Queue reads allowed per request while pruning deleted / flagged games
+REVIEW_MAX_PASSES = 3
+
+
+# 📌 Next games due for spaced-repetition review
+@router.get("/next")
+def get_next_reviews(n: int = Query(10, ge=1, le=100), current_user: User = Depends(get_current_user)):
+    for _ in range(REVIEW_MAX_PASSES):
+        game_ids, due_count = due_games(current_user.id, n)
+
+        # One batched fetch (cache first) for the selected games only
+        found = get_game_docs(game_ids)
+        playable = {
+            g: data for g, data in found.items()
+            if not data.get("flagged") and can_view_game(data, current_user.id)
+        }
+        games = [playable[g] for g in game_ids if g in playable]
+
+        # Prune deleted, flagged and no-longer-visible games: they are never answered,
+        # so they would stay most-overdue forever and take up slots. Then refill from the queue.
+        stale = [g for g in game_ids if g not in playable]
+        if not stale:
+            break
+        forget_games(current_user.id, stale)
+
+    return AppJSONResponse({"dueCount": due_count, "games": games})
@@ -12,10 +12,13 @@ from app.services.generation import generate_games_from_prompt
 from app.models.user_model import User
 from app.models.user import UserCreate
 from app.firebase.firebase_config import db
+from app.firebase.queries import build_query
+from app.services.cache import user_cache
 from app.utils.auth import (
     hash_password,
     verify_password,
-    create_access_token,
+    create_token_pair,
+    refresh_tokens,
     get_current_user,
 )
 
@@ -43,7 +46,7 @@ def create_user(user: UserCreate):
     print("📥 Incoming user data:", user.dict())
 
     # check if email already exists
-    existing_user = db.collection("users").where("email", "==", user.email).get()
+    existing_user = build_query("users_by_email", email=user.email).limit(1).get()
     if existing_user:
         # 409 Conflict + normalized error body at root
         return http_error(409, "email", "Email already registered")
@@ -73,8 +76,7 @@ def create_user(user: UserCreate):
 @router.post("/login")
 def login(form_data: OAuth2PasswordRequestForm = Depends()):
     query = (
-        db.collection("users")
-        .where("email", "==", form_data.username)
+        build_query("users_by_email", email=form_data.username)
         .limit(1)
         .stream()
     )
@@ -88,16 +90,27 @@ def login(form_data: OAuth2PasswordRequestForm = Depends()):
     if not verify_password(form_data.password, user_data["hashed_password"]):
         return http_error(401, "password", "Invalid email or password")
 
-    token = create_access_token(
-        {
-            "sub": user_data["id"],
-            "email": user_data["email"],
-            "name": user_data["name"],
-            "lastName": user_data["lastname"],
-        }
-    )
+    # Short-lived access token + refresh token carrying only sub/exp/tv
+    return create_token_pair(user_data["id"], user_data.get("tokenVersion", 0))
 
-    return {"access_token": token, "token_type": "bearer"}
+# ---------------------------
+# REFRESH / LOGOUT
+# ---------------------------
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+@router.post("/token/refresh")
+def refresh(payload: RefreshRequest):
+    return refresh_tokens(payload.refresh_token)
+
+@router.post("/logout")
+def logout(current_user: User = Depends(get_current_user)):
+    # Bumping the token version revokes every access and refresh token issued so far
+    db.collection("users").document(current_user.id).update(
+        {"tokenVersion": firestore.Increment(1)}
+    )
+    user_cache.invalidate(current_user.id)
+    return {"success": True}
 
 # ---------------------------
 # GET CURRENT USER
@@ -132,15 +145,16 @@ def update_interests(
 
     # ✅ Save exactly 5 interests
     doc_ref.update({"interests": payload.interests})
+    user_cache.invalidate(user_id)
     updated_user = doc_ref.get().to_dict()
 
     # ✅ If no folders, generate one based on first interest
     has_folders = (
-        db.collection("folders").where("createdBy", "==", user_id).limit(1).get()
+        build_query("folders_by_owner", createdBy=user_id).limit(1).get()
     )
     if not has_folders:
         first_interest = payload.interests[0]
-        generated = generate_games_from_prompt(first_interest)
+        generated = generate_games_from_prompt(first_interest, user_id=user_id)
 
         folder_id = str(uuid4())
         folder_data = {
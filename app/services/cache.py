@@ -0,0 +1,55 @@
+import os
+
+from app.firebase.firebase_config import db
+from app.utils.cache_bus import SharedTTLCache
+
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "60"))
+GAME_CACHE_TTL = float(os.getenv("GAME_CACHE_TTL", "600"))
+
+# Process-local; invalidate() reaches every worker through the cache bus
+user_cache = SharedTTLCache("users", USER_CACHE_TTL)
+game_cache = SharedTTLCache("games", GAME_CACHE_TTL, maxsize=50000)
+
+
+def _doc_to_dict(snap):
+    if not snap.exists:
+        return None
+    data = snap.to_dict()
+    data["id"] = snap.id
+    return data
+
+
+def _load(collection: str):
+    return lambda doc_id: _doc_to_dict(db.collection(collection).document(doc_id).get())
+
+
+# Callers get shallow copies so they can add/rename keys without touching the cache
+def get_user_doc(user_id: str):
+    data = user_cache.get_or_load(user_id, _load("users"))
+    return dict(data) if data is not None else None
+
+
+def get_game_doc(game_id: str):
+    data = game_cache.get_or_load(game_id, _load("games"))
+    return dict(data) if data is not None else None
+
+
+def get_game_docs(game_ids: list) -> dict:
+    """gameId -> game dict for every existing game; cache misses are fetched in one get_all."""
+    found, missing = {}, []
+    for game_id in game_ids:
+        data = game_cache.get(game_id)
+        if data is None:
+            missing.append(game_id)
+        else:
+            found[game_id] = dict(data)
+
+    if missing:
+        generations = {g: game_cache.generation(g) for g in missing}
+        refs = [db.collection("games").document(g) for g in missing]
+        for snap in db.get_all(refs):
+            data = _doc_to_dict(snap)
+            if data is not None:
+                game_cache.set(snap.id, data, generations[snap.id])
+                found[snap.id] = dict(data)
+    return found
@@ -0,0 +1,159 @@
+import os
+import re
+import random
+import hashlib
+import threading
+from collections import OrderedDict
+
+from app.firebase.firebase_config import db
+
+# Estimated Jaccard similarity of question words above which two games count
+# as duplicates: when they share the correct answer, and regardless of it
+DUPLICATE_SAME_ANSWER_SIMILARITY = float(os.getenv("DUPLICATE_SAME_ANSWER_SIMILARITY", "0.5"))
+DUPLICATE_ANY_ANSWER_SIMILARITY = float(os.getenv("DUPLICATE_ANY_ANSWER_SIMILARITY", "0.8"))
+# Folder indexes kept in memory between requests
+DEDUP_CACHE_SIZE = int(os.getenv("DEDUP_CACHE_SIZE", "500"))
+
+MINHASH_SLOTS = 64
+_PRIME = (1 << 61) - 1
+_rng = random.Random(2024)   # fixed seed: signatures must be stable across processes
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(MINHASH_SLOTS)]
+
+_WORD = re.compile(r"[a-z0-9]+")
+# Question filler that says nothing about what is being asked
+STOPWORDS = {
+    "a", "an", "the", "of", "in", "on", "at", "to", "for", "by", "as", "and", "or",
+    "is", "are", "was", "were", "do", "does", "did", "s",
+    "what", "which", "who", "whom", "when", "where", "how",
+}
+
+
+# ---------------------------
+# Fingerprints
+# ---------------------------
+def _tokens(text: str) -> set[str]:
+    return {w for w in _WORD.findall((text or "").lower()) if w not in STOPWORDS}
+
+
+def _hash64(token: str) -> int:
+    return int.from_bytes(hashlib.blake2b(token.encode(), digest_size=8).digest(), "big")
+
+
+def fingerprint(question: str, correct_answer: str = ""):
+    """
+    (normalized correct answer, MinHash signature of the question's content words).
+    """
+    hashes = [_hash64(t) for t in _tokens(question)] or [0]
+    signature = tuple(min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMUTATIONS)
+    return " ".join(sorted(_tokens(correct_answer))), signature
+
+
+def similarity(fp1, fp2) -> float:
+    """Estimated Jaccard similarity of the two questions' word sets."""
+    return sum(x == y for x, y in zip(fp1[1], fp2[1])) / MINHASH_SLOTS
+
+
+def is_near_duplicate(fp1, fp2) -> bool:
+    sim = similarity(fp1, fp2)
+    if sim >= DUPLICATE_ANY_ANSWER_SIMILARITY:
+        return True
+    return fp1[0] == fp2[0] and sim >= DUPLICATE_SAME_ANSWER_SIMILARITY
+
+
+# ---------------------------
+# Per-folder index
+# ---------------------------
+class FolderIndex:
+    """
+    Fingerprints of a folder's games. Folders hold at most a few hundred
+    games, so lookups are a linear scan over the signatures.
+    Requests generating into the folder reserve fingerprints of games they
+    are about to save, so two concurrent requests can't both keep the same
+    question. All access goes through `lock`.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.fingerprints: dict = {}   # gameId -> fingerprint
+        self.pending: dict = {}        # reservation token -> fingerprint (not saved yet)
+
+    def add(self, game_id: str, fp):
+        self.fingerprints[game_id] = fp
+
+    def remove_missing(self, game_ids: set):
+        for stale in set(self.fingerprints) - game_ids:
+            del self.fingerprints[stale]
+
+    def is_duplicate(self, fp) -> bool:
+        return (any(is_near_duplicate(fp, other) for other in self.fingerprints.values())
+                or any(is_near_duplicate(fp, other) for other in self.pending.values()))
+
+    def reserve(self, fp):
+        """Check and reserve in one step; returns a token, or None for a duplicate."""
+        with self.lock:
+            if self.is_duplicate(fp):
+                return None
+            token = object()
+            self.pending[token] = fp
+            return token
+
+    def commit(self, token, game_id: str):
+        """Turn a reservation into the saved game's fingerprint."""
+        with self.lock:
+            self.add(game_id, self.pending.pop(token))
+
+    def release(self, tokens):
+        with self.lock:
+            for token in tokens:
+                self.pending.pop(token, None)
+
+
+_cache_lock = threading.Lock()
+_indexes: "OrderedDict[str, FolderIndex]" = OrderedDict()
+
+
+def get_folder_index(folder_id: str, game_ids: list) -> FolderIndex:
+    """
+    Return the cached index for a folder, fetching fingerprints only for
+    games it has not seen yet (all of them on first use).
+    """
+    with _cache_lock:
+        index = _indexes.get(folder_id)
+        if index is None:
+            index = _indexes[folder_id] = FolderIndex()
+        _indexes.move_to_end(folder_id)
+        while len(_indexes) > DEDUP_CACHE_SIZE:
+            _indexes.popitem(last=False)
+
+    with index.lock:
+        index.remove_missing(set(game_ids))
+        missing = [g for g in game_ids if g not in index.fingerprints]
+        if missing:
+            refs = [db.collection("games").document(g) for g in missing]
+            for snap in db.get_all(refs):
+                if snap.exists:
+                    g = snap.to_dict()
+                    index.add(snap.id, fingerprint(g.get("question", ""), g.get("correctAnswer", "")))
+    return index
+
+
+def forget_folder(folder_id: str):
+    with _cache_lock:
+        _indexes.pop(folder_id, None)
+
+
+def drop_duplicates(index: FolderIndex, games: list):
+    """
+    Split generated games into (fresh, duplicates), checking against the
+    folder's saved games, other requests' reservations and games already
+    kept this request. Fresh games come back as (game, reservation token)
+    pairs; `index.commit` or `index.release` each token when done.
+    """
+    fresh, duplicates = [], []
+    for g in games:
+        token = index.reserve(fingerprint(g["question"], g.get("correctAnswer", "")))
+        if token is None:
+            duplicates.append(g)
+        else:
+            fresh.append((g, token))
+    return fresh, duplicates
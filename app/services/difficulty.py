@@ -0,0 +1,121 @@
+from datetime import datetime
+
+from app.firebase.firebase_config import db
+
+# Weight of the newest answer in the recent-accuracy moving average
+RECENT_ALPHA = 0.3
+# Below this many answered games we keep the folder's current difficulty
+MIN_ANSWERS = 5
+HARDER_ABOVE = 0.8
+EASIER_BELOW = 0.5
+# After this long away, step difficulty down one level
+STALE_AFTER_DAYS = 14
+
+LEVELS = ["easier", "same", "harder"]
+
+
+# ---------------------------
+# Incremental aggregates
+# ---------------------------
+def empty_stats() -> dict:
+    return {"answered": 0, "correct": 0, "recentAccuracy": None, "lastAnsweredAt": None}
+
+
+def update_stats(stats: dict, previous: dict, correct: bool, answered_at: str) -> dict:
+    """
+    Fold one answer into the folder's aggregates without rescanning playedGames.
+    `previous` is the game's earlier entry (re-answers replace their old result).
+    """
+    stats = {**empty_stats(), **(stats or {})}
+    if previous is None:
+        stats["answered"] += 1
+    elif previous.get("correct"):
+        stats["correct"] -= 1
+    if correct:
+        stats["correct"] += 1
+
+    x = 1.0 if correct else 0.0
+    recent = stats["recentAccuracy"]
+    stats["recentAccuracy"] = x if recent is None else round(RECENT_ALPHA * x + (1 - RECENT_ALPHA) * recent, 4)
+    stats["lastAnsweredAt"] = answered_at
+    return stats
+
+
+def stats_from_played(played: dict) -> dict:
+    """One-off backfill for progress docs written before aggregates existed."""
+    stats = empty_stats()
+    entries = sorted(played.values(), key=lambda p: p.get("answeredAt") or "")
+    for entry in entries:
+        stats = update_stats(stats, None, bool(entry.get("correct")), entry.get("answeredAt"))
+    return stats
+
+
+# ---------------------------
+# Scoring
+# ---------------------------
+def score(progress: dict, now: datetime = None) -> dict:
+    """Accuracy, recency and the suggested difficulty for one folder's progress doc."""
+    progress = progress or {}
+    stats = progress.get("stats") or stats_from_played(progress.get("playedGames", {}))
+    now = now or datetime.utcnow()
+
+    answered = stats["answered"]
+    accuracy = stats["correct"] / answered if answered else None
+    days_idle = None
+    if stats["lastAnsweredAt"]:
+        days_idle = (now - datetime.fromisoformat(stats["lastAnsweredAt"])).days
+
+    return {
+        "answered": answered,
+        "accuracy": round(accuracy, 3) if accuracy is not None else None,
+        "recentAccuracy": stats["recentAccuracy"],
+        "daysIdle": days_idle,
+        "difficulty": pick_difficulty(answered, stats["recentAccuracy"], days_idle),
+    }
+
+
+def pick_difficulty(answered: int, recent_accuracy, days_idle) -> str:
+    if answered < MIN_ANSWERS or recent_accuracy is None:
+        level = "same"
+    elif recent_accuracy >= HARDER_ABOVE:
+        level = "harder"
+    elif recent_accuracy < EASIER_BELOW:
+        level = "easier"
+    else:
+        level = "same"
+
+    if days_idle is not None and days_idle >= STALE_AFTER_DAYS:
+        level = LEVELS[max(0, LEVELS.index(level) - 1)]
+    return level
+
+
+def pick_games(progress: dict, game_ids: list, n: int) -> list:
+    """
+    Choose which of the folder's existing games to serve next:
+    previously missed games (oldest miss first), then unplayed ones.
+    Games already answered correctly are left out.
+    """
+    played = (progress or {}).get("playedGames", {})
+    missed = sorted(
+        (g for g in game_ids if g in played and not played[g].get("correct")),
+        key=lambda g: played[g].get("answeredAt") or "",
+    )
+    unplayed = [g for g in game_ids if g not in played]
+    return (missed + unplayed)[:n]
+
+
+# ---------------------------
+# Firestore helpers
+# ---------------------------
+def get_progress(user_id: str, folder_id: str) -> dict:
+    doc = db.collection("users").document(user_id).collection("progress").document(folder_id).get()
+    return doc.to_dict() if doc.exists else {}
+
+
+def score_all_folders(user_id: str) -> dict:
+    """Score every folder the user has progress in, in a single pass over the subcollection."""
+    now = datetime.utcnow()
+    return {
+        doc.id: score(doc.to_dict(), now)
+        for doc in db.collection("users").document(user_id).collection("progress").stream()
+    }
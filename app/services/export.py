@@ -0,0 +1,173 @@
+import json
+import zlib
+from datetime import datetime
+from uuid import uuid4
+
+from app.firebase.firebase_config import db
+from app.firebase.queries import build_query, paginate
+from app.utils.serialization import dumps
+
+EXPORT_FORMAT_VERSION = 1
+GAME_FETCH_CHUNK = 100
+# Firestore batches cap at 500 writes
+IMPORT_BATCH_SIZE = 400
+
+
+# ---------------------------
+# Export (NDJSON, one record per line)
+# ---------------------------
+def _line(record_type: str, data: dict, **extra) -> bytes:
+    return dumps({"type": record_type, **extra, "data": data}) + b"\n"
+
+
+def _folder_records(folder: dict, progress: dict = None):
+    yield _line("folder", folder)
+
+    game_ids = folder.get("gameIds", [])
+    for i in range(0, len(game_ids), GAME_FETCH_CHUNK):
+        refs = [db.collection("games").document(g) for g in game_ids[i:i + GAME_FETCH_CHUNK]]
+        for snap in db.get_all(refs):
+            if snap.exists:
+                yield _line("game", {**snap.to_dict(), "id": snap.id})
+
+    if progress:
+        yield _line("progress", progress, folderId=folder["id"])
+
+
+def export_folder(user_id: str, folder: dict):
+    """Records for one folder: meta, folder, its games, the user's progress on it."""
+    yield _line("meta", {"version": EXPORT_FORMAT_VERSION, "scope": "folder", "exportedAt": datetime.utcnow()})
+    progress_doc = db.collection("users").document(user_id).collection("progress").document(folder["id"]).get()
+    yield from _folder_records(folder, progress_doc.to_dict() if progress_doc.exists else None)
+
+
+def export_user(user_id: str):
+    """Records for every folder the user owns, read page by page."""
+    yield _line("meta", {"version": EXPORT_FORMAT_VERSION, "scope": "user", "exportedAt": datetime.utcnow()})
+
+    progress_ref = db.collection("users").document(user_id).collection("progress")
+    for snap in paginate(build_query("folders_by_owner", createdBy=user_id)):
+        folder = {**snap.to_dict(), "id": snap.id}
+        progress_doc = progress_ref.document(snap.id).get()
+        yield from _folder_records(folder, progress_doc.to_dict() if progress_doc.exists else None)
+
+
+def gzip_stream(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)   # wbits=31 → gzip container
+    for chunk in chunks:
+        out = compressor.compress(chunk)
+        if out:
+            yield out
+    yield compressor.flush()
+
+
+# ---------------------------
+# Import
+# ---------------------------
+class ImportWriter:
+    """
+    Re-owns exported records to `user_id` under fresh ids and writes them in
+    batched commits. Feed it NDJSON lines in export order (folder before its
+    games); only the old→new id maps are kept in memory.
+    With dry_run=True it only parses and counts, to validate a file before
+    anything is written.
+    """
+
+    def __init__(self, user_id: str, dry_run: bool = False):
+        self.user_id = user_id
+        self.dry_run = dry_run
+        self.folder_ids: dict[str, str] = {}
+        self.game_ids: dict[str, str] = {}
+        self.counts = {"folders": 0, "games": 0, "progress": 0, "skipped": 0}
+        self._batch = db.batch()
+        self._pending = 0
+
+    def _set(self, ref, data: dict):
+        if self.dry_run:
+            return
+        self._batch.set(ref, data)
+        self._pending += 1
+
+    def ready_batch(self):
+        """Return a full batch to commit (and start a new one), or None."""
+        if self._pending < IMPORT_BATCH_SIZE:
+            return None
+        return self.take_batch()
+
+    def take_batch(self):
+        batch, self._batch, self._pending = self._batch, db.batch(), 0
+        return batch
+
+    def write_all(self, lines):
+        """Add every line, committing each full batch and then the remainder."""
+        for line in lines:
+            self.add_line(line)
+            batch = self.ready_batch()
+            if batch is not None:
+                batch.commit()
+        self.take_batch().commit()
+
+    def add_line(self, line: bytes):
+        line = line.strip()
+        if not line:
+            return
+        record = json.loads(line)
+        if not isinstance(record, dict) or not isinstance(record.get("data", {}), dict):
+            raise ValueError("each line must be an object with an object 'data'")
+        handler = getattr(self, f"_add_{record.get('type')}", None)
+        if handler is None:
+            self.counts["skipped"] += 1
+            return
+        handler(record)
+
+    def _add_meta(self, record: dict):
+        if record["data"].get("version") != EXPORT_FORMAT_VERSION:
+            raise ValueError(f"Unsupported export version: {record['data'].get('version')}")
+
+    def _add_folder(self, record: dict):
+        folder = record["data"]
+        new_id = self.folder_ids[folder["id"]] = str(uuid4())
+        new_game_ids = []
+        for old in folder.get("gameIds", []):
+            self.game_ids[old] = str(uuid4())
+            new_game_ids.append(self.game_ids[old])
+
+        self._set(db.collection("folders").document(new_id), {
+            **folder,
+            "id": new_id,
+            "createdBy": self.user_id,
+            "createdAt": datetime.utcnow().isoformat(),
+            "gameIds": new_game_ids,
+        })
+        self.counts["folders"] += 1
+
+    def _add_game(self, record: dict):
+        game = record["data"]
+        new_id = self.game_ids.get(game.get("id"))
+        folder_id = self.folder_ids.get(game.get("folderId"))
+        if new_id is None or folder_id is None:
+            self.counts["skipped"] += 1
+            return
+        game = {k: v for k, v in game.items() if k not in ("flagged", "flaggedAt")}
+        self._set(db.collection("games").document(new_id), {
+            **game,
+            "id": new_id,
+            "folderId": folder_id,
+            "createdBy": self.user_id,
+        })
+        self.counts["games"] += 1
+
+    def _add_progress(self, record: dict):
+        folder_id = self.folder_ids.get(record.get("folderId"))
+        if folder_id is None:
+            self.counts["skipped"] += 1
+            return
+        progress = dict(record["data"])
+        progress["playedGames"] = {
+            self.game_ids[g]: entry
+            for g, entry in progress.get("playedGames", {}).items()
+            if g in self.game_ids
+        }
+        ref = db.collection("users").document(self.user_id).collection("progress").document(folder_id)
+        self._set(ref, progress)
+        self.counts["progress"] += 1
@@ -1,21 +1,91 @@
 import os
-import json
-import openai
+import time
 from dotenv import load_dotenv
+from pydantic import ValidationError
+
+from app.models.game import GeneratedGame
+from app.services.json_extraction import iter_json_objects
+from app.services.openai_client import chat_completion
+from app.services.llm_ledger import (
+    record_llm_call, OUTCOME_OK, OUTCOME_UNSUITABLE, OUTCOME_PARSE_ERROR, OUTCOME_API_ERROR,
+)
 
 # Load environment variables
 load_dotenv()
-openai.api_key = os.getenv("OPENAI_API_KEY")
 
+# Extra calls allowed to top up games lost to truncated / invalid output
+MAX_FOLLOW_UPS = 2
+
+# "json" = free-form JSON array, "structured" = JSON-schema response format
+GENERATION_MODE = os.getenv("GENERATION_MODE", "json")
+
+DEFAULT_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+MODEL_BY_DIFFICULTY = {
+    "same": DEFAULT_MODEL,
+    "easier": os.getenv("OPENAI_MODEL_EASIER", DEFAULT_MODEL),
+    "harder": os.getenv("OPENAI_MODEL_HARDER", DEFAULT_MODEL),
+}
+
+
+# -------------------------------
+# Structured output schema
+# -------------------------------
+# Keywords OpenAI strict mode does not accept
+_UNSUPPORTED_SCHEMA_KEYS = {"title", "default", "minLength", "maxLength", "minItems", "maxItems"}
 
-def generate_games_from_prompt(prompt: str, count: int = 3):
-    """
-    Generate quiz games from a topic using OpenAI.
-    Ensures: valid topic, appropriate content, confident response.
-    Returns a list of dicts (question, options, correctAnswer, explanation, topic).
-    """
 
-    system_prompt = (
+def _strict_schema(schema: dict) -> dict:
+    """Turn a pydantic JSON schema into one accepted by OpenAI strict mode."""
+    if isinstance(schema, list):
+        return [_strict_schema(s) for s in schema]
+    if not isinstance(schema, dict):
+        return schema
+    out = {k: _strict_schema(v) for k, v in schema.items() if k not in _UNSUPPORTED_SCHEMA_KEYS}
+    if out.get("type") == "object" and "properties" in out:
+        out["required"] = list(out["properties"])
+        out["additionalProperties"] = False
+    return out
+
+
+def _quiz_response_format() -> dict:
+    game_schema = _strict_schema(GeneratedGame.model_json_schema())
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": "quiz",
+            "strict": True,
+            "schema": {
+                "type": "object",
+                "properties": {
+                    "status": {"type": "string", "enum": ["OK", "UNSUITABLE"]},
+                    "games": {"type": "array", "items": game_schema},
+                },
+                "required": ["status", "games"],
+                "additionalProperties": False,
+            },
+        },
+    }
+
+
+QUIZ_RESPONSE_FORMAT = _quiz_response_format()
+
+
+# -------------------------------
+# Prompting
+# -------------------------------
+def _structured_system_prompt(count: int, avoid: list[str]) -> str:
+    prompt = (
+        f"Write {count} multiple-choice quiz games on the user's topic. "
+        "4 options each; correctAnswer must equal one option. "
+        "If the topic is inappropriate or unclear, set status UNSUITABLE and return no games."
+    )
+    if avoid:
+        prompt += " Avoid: " + " | ".join(avoid)
+    return prompt
+
+
+def _system_prompt(count: int, avoid: list[str]) -> str:
+    prompt = (
         "You are a quiz generator. "
         "If the topic is inappropriate (violence, hate, sex, politics, etc.) "
         "or if you are not confident you understand it, respond with: {\"status\":\"UNSUITABLE\"}. "
@@ -27,38 +97,111 @@ def generate_games_from_prompt(prompt: str, count: int = 3):
         "explanation (string),\n"
         "topic (string like 'history','math','geography')."
     )
+    if avoid:
+        prompt += "\nDo not repeat these questions:\n" + "\n".join(f"- {q}" for q in avoid)
+    return prompt
+
+
+def parse_games(raw: str):
+    """
+    Salvage every complete, schema-valid game from raw model output.
+    Returns (games, rejected_count, unsuitable).
+    """
+    games, rejected, unsuitable = [], 0, False
+
+    for obj in iter_json_objects(raw):
+        if obj.get("status") == "UNSUITABLE":
+            unsuitable = True
+        # Structured mode's {"status": ..., "games": [...]} wrapper is yielded after
+        # its games, which the extractor already returned one by one
+        if "question" not in obj:
+            continue
+        try:
+            games.append(GeneratedGame(**obj).model_dump(exclude_none=True))
+        except ValidationError as e:
+            rejected += 1
+            print("⚠️ Dropping invalid game:", e.errors()[0]["msg"], obj)
+
+    return games, rejected, unsuitable
+
+
+def _request_games(prompt: str, count: int, avoid: list[str], model: str, mode: str):
+    if mode == "structured":
+        extra = {"response_format": QUIZ_RESPONSE_FORMAT}
+        system_prompt = _structured_system_prompt(count, avoid)
+    else:
+        extra = {}
+        system_prompt = _system_prompt(count, avoid)
+
+    response = chat_completion(
+        model=model,
+        messages=[
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": f"Topic: {prompt}"},
+        ],
+        temperature=0.3,   # lower = more reliable JSON
+        **extra,
+    )
+    message = response.choices[0].message
+    usage = getattr(response, "usage", None)
+    # Structured mode reports refusals in `refusal`, with no content
+    if message.content is None or getattr(message, "refusal", None):
+        print("🚫 GPT refused:", getattr(message, "refusal", None))
+        return None, usage
+    raw = message.content.strip()
+    print("🔎 RAW GPT OUTPUT (first 300 chars):", raw[:300])
+    return raw, usage
+
 
-    user_prompt = f"Topic: {prompt}"
+def generate_games_from_prompt(prompt: str, count: int = 3, difficulty: str = "same", mode: str = None,
+                               avoid: list[str] = None, user_id: str = None):
+    """
+    Generate quiz games from a topic using OpenAI.
+    Ensures: valid topic, appropriate content, confident response.
+    Partial output is salvaged and only the missing games are requested again.
+    `avoid` lists questions the model should not repeat.
+    Every call is recorded in the LLM ledger under `user_id`.
+    Returns a list of dicts (question, options, correctAnswer, explanation, topic).
+    """
+    mode = mode or GENERATION_MODE
+    model = MODEL_BY_DIFFICULTY.get(difficulty, DEFAULT_MODEL)
+    games = []
 
     try:
-        response = openai.ChatCompletion.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt},
-            ],
-            temperature=0.3,   # lower = more reliable JSON
-        )
-
-        raw = response.choices[0].message["content"].strip()
-        print("🔎 RAW GPT OUTPUT (first 300 chars):", raw[:300])
-
-        # Handle refusal
-        if raw.startswith("{") and "\"status\":\"UNSUITABLE\"" in raw:
-            raise ValueError("❌ Topic unsuitable or AI not confident.")
-
-        # Clean code fences
-        if "```" in raw:
-            raw = raw.split("```")
-            raw = next((part for part in raw if "{" in part or "[" in part), "").strip()
-            raw = raw.replace("json", "").strip()
-
-        games_json = json.loads(raw)
-
-        if not isinstance(games_json, list):
-            raise ValueError("Expected a JSON array of games")
-
-        return games_json
+        for _ in range(1 + MAX_FOLLOW_UPS):
+            missing = count - len(games)
+            started = time.perf_counter()
+            try:
+                raw, usage = _request_games(prompt, missing, (avoid or []) + [g["question"] for g in games], model, mode)
+            except Exception:
+                record_llm_call(user_id, model, mode, difficulty, prompt, None,
+                                (time.perf_counter() - started) * 1000, OUTCOME_API_ERROR)
+                raise
+            latency_ms = (time.perf_counter() - started) * 1000
+            # A refusal counts as an unsuitable topic, like {"status": "UNSUITABLE"}
+            valid, rejected, unsuitable = parse_games(raw) if raw is not None else ([], 0, True)
+
+            if valid:
+                outcome = OUTCOME_OK
+            else:
+                outcome = OUTCOME_UNSUITABLE if unsuitable else OUTCOME_PARSE_ERROR
+            record_llm_call(user_id, model, mode, difficulty, prompt, usage, latency_ms, outcome,
+                            games_requested=missing, games_valid=min(len(valid), missing),
+                            games_rejected=rejected)
+
+            # Handle refusal
+            if unsuitable and not valid:
+                raise ValueError("❌ Topic unsuitable or AI not confident.")
+
+            games.extend(valid[:missing])
+            if len(games) >= count:
+                break
+            print(f"⚠️ Got {len(valid)}/{missing} games ({rejected} rejected), requesting {count - len(games)} more")
+
+        if not games:
+            raise ValueError("No valid games in GPT output")
+
+        return games
 
     except Exception as e:
         print("❌ GPT generation error:", str(e))
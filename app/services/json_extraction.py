@@ -0,0 +1,60 @@
+import json
+
+
+def iter_json_objects(raw: str):
+    """
+    Yield every complete JSON object found in raw LLM output: at the top
+    level, directly inside a top-level array, or inside the `games` array of
+    a top-level object (structured mode's {"status": ..., "games": [...]}).
+    Games are yielded as they complete, before the wrapper does, so a
+    truncated wrapper still salvages them.
+    Prose, code fences and a truncated trailing object are skipped instead of
+    failing the whole parse, so every finished game can be salvaged.
+    """
+    stack = []          # open brackets ("g" = the wrapper's games array), only tracked once inside JSON
+    starts = {}         # depth -> index where an object being captured begins
+    in_string = False
+    string_start = 0
+    last_key = None     # last string seen directly inside a top-level object
+    escaped = False
+
+    for i, ch in enumerate(raw):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+                if stack == ["{"]:
+                    last_key = raw[string_start + 1:i]
+            continue
+
+        if ch == '"':
+            # Quotes in surrounding prose are not JSON strings
+            if stack:
+                in_string = True
+                string_start = i
+        elif ch in "[{":
+            if ch == "{" and (all(opener == "[" for opener in stack) or stack == ["{", "g"]):
+                starts[len(stack)] = i
+            if ch == "[" and stack == ["{"] and last_key == "games":
+                ch = "g"
+            stack.append(ch)
+        elif ch in "]}":
+            if not stack:
+                continue
+            opener = stack.pop()
+            if (opener == "{") != (ch == "}"):
+                # Mismatched bracket: drop what we had and resync
+                stack.clear()
+                starts.clear()
+                continue
+            start = starts.pop(len(stack), None) if ch == "}" else None
+            if start is not None:
+                try:
+                    value = json.loads(raw[start:i + 1])
+                except ValueError:
+                    value = None
+                if isinstance(value, dict):
+                    yield value
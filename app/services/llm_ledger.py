@@ -0,0 +1,188 @@
+import os
+import json
+from collections import defaultdict
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+from google.cloud import firestore
+
+from app.firebase.firebase_config import db
+from app.firebase.queries import build_query
+from app.utils.batcher import BatchWriter
+
+# USD per 1M tokens as [prompt, completion]; override with LLM_PRICES='{"model": [in, out]}'
+MODEL_PRICES = {
+    "gpt-4o-mini": [0.15, 0.60],
+    "gpt-4o": [2.50, 10.00],
+    **json.loads(os.getenv("LLM_PRICES", "{}")),
+}
+# Each call costs 1 write + up to 1 rollup write; Firestore batches cap at 500
+LEDGER_BATCH_SIZE = 200
+
+# Outcomes of a single LLM call
+OUTCOME_OK = "ok"
+OUTCOME_UNSUITABLE = "unsuitable"
+OUTCOME_PARSE_ERROR = "parse_error"
+OUTCOME_API_ERROR = "api_error"
+
+
+def cost_usd(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    prompt_price, completion_price = MODEL_PRICES.get(model, [0.0, 0.0])
+    return round((prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000, 6)
+
+
+# Per-call fields summed into each daily rollup
+CALL_FIELDS = ("promptTokens", "completionTokens", "costUsd", "latencyMs",
+               "gamesRequested", "gamesValid", "gamesRejected")
+GENERATION_FIELDS = ("gamesKept", "gamesSkipped")
+# Rollup map -> record field it breaks calls down by
+BREAKDOWNS = {"byMode": "mode", "byModel": "model", "byDifficulty": "difficulty"}
+
+
+def _rollup_id(user_id: str, day: str) -> str:
+    return f"{user_id or 'anonymous'}_{day}"
+
+
+def _flush(records: list):
+    """
+    Write raw records to `llm_calls` and fold them into per-user daily
+    rollups in `llm_usage_daily`, pre-aggregated so each user/day costs one write.
+    Rollups also break calls down by mode, model and difficulty.
+    """
+    rollups = defaultdict(lambda: defaultdict(int))   # (userId, date) -> {field path: total}
+    batch = db.batch()
+    for r in records:
+        batch.set(db.collection("llm_calls").document(r["id"]), r)
+
+        totals = rollups[(r.get("userId"), r["date"])]
+        if r["kind"] == "call":
+            for prefix in [()] + [(m, r.get(f) or "unknown") for m, f in BREAKDOWNS.items()]:
+                totals[prefix + ("calls",)] += 1
+                for f in CALL_FIELDS:
+                    totals[prefix + (f,)] += r.get(f, 0)
+            totals[("outcomes", r["outcome"])] += 1
+        else:
+            for prefix in [(), ("byDifficulty", r.get("difficulty") or "unknown")]:
+                totals[prefix + ("generations",)] += 1
+                for f in GENERATION_FIELDS:
+                    totals[prefix + (f,)] += r[f]
+
+    for (user_id, day), totals in rollups.items():
+        update = {"userId": user_id, "date": day}
+        for path, value in totals.items():
+            # Maps only carry the keys being incremented: an empty one would replace the stored map on merge
+            node = update
+            for part in path[:-1]:
+                node = node.setdefault(part, {})
+            node[path[-1]] = firestore.Increment(value)
+        batch.set(db.collection("llm_usage_daily").document(_rollup_id(user_id, day)), update, merge=True)
+
+    batch.commit()
+
+
+ledger_writer = BatchWriter("llm_ledger", _flush, max_batch=LEDGER_BATCH_SIZE)
+
+
+def _base_record(kind: str, user_id: str, **fields) -> dict:
+    now = datetime.utcnow()
+    return {
+        "id": str(uuid4()),
+        "kind": kind,
+        "userId": user_id,
+        "createdAt": now.isoformat(),
+        "date": now.date().isoformat(),
+        **fields,
+    }
+
+
+def record_llm_call(user_id: str, model: str, mode: str, difficulty: str, prompt: str,
+                    usage, latency_ms: float, outcome: str,
+                    games_requested: int = 0, games_valid: int = 0, games_rejected: int = 0):
+    prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+    completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+    ledger_writer.put(_base_record(
+        "call", user_id,
+        model=model,
+        mode=mode,
+        difficulty=difficulty,
+        prompt=(prompt or "")[:200],
+        promptTokens=prompt_tokens,
+        completionTokens=completion_tokens,
+        costUsd=cost_usd(model, prompt_tokens, completion_tokens),
+        latencyMs=round(latency_ms, 1),
+        outcome=outcome,
+        gamesRequested=games_requested,
+        gamesValid=games_valid,
+        gamesRejected=games_rejected,
+    ))
+
+
+def record_folder_generation(user_id: str, folder_id: str, difficulty: str, requested: int, kept: int, skipped: int):
+    """Games kept vs skipped (duplicates) for one generate-from-folder request."""
+    ledger_writer.put(_base_record(
+        "generation", user_id,
+        folderId=folder_id,
+        difficulty=difficulty,
+        gamesRequested=requested,
+        gamesKept=kept,
+        gamesSkipped=skipped,
+    ))
+
+
+def _with_rates(totals: dict) -> dict:
+    calls = totals.get("calls") or 1
+    requested = totals.get("gamesRequested", 0)
+    tokens = totals.get("promptTokens", 0) + totals.get("completionTokens", 0)
+    return {
+        **totals,
+        "costUsd": round(totals.get("costUsd", 0), 4),
+        "avgLatencyMs": round(totals.get("latencyMs", 0) / calls, 1),
+        "tokensPerValidGame": round(tokens / (totals.get("gamesValid") or 1), 1),
+        "invalidRate": round(1 - totals.get("gamesValid", 0) / requested, 3) if requested else 0.0,
+    }
+
+
+def usage_summary(days: int = 7, user_id: str = None) -> dict:
+    """
+    Totals, per-day, per-user and per mode / model / difficulty breakdowns
+    from the daily rollups (no raw-call scans).
+    """
+    since = (datetime.utcnow() - timedelta(days=days - 1)).date().isoformat()
+    if user_id:
+        q = build_query("llm_usage_by_user_since", userId=user_id, date=since)
+    else:
+        q = build_query("llm_usage_since", date=since)
+
+    fields = ("calls", *CALL_FIELDS, "generations", *GENERATION_FIELDS)
+    totals = defaultdict(int)
+    by_day = defaultdict(lambda: defaultdict(int))
+    by_user = defaultdict(lambda: defaultdict(int))
+    breakdowns = {m: defaultdict(lambda: defaultdict(int)) for m in BREAKDOWNS}
+    outcomes = defaultdict(int)
+
+    for doc in q.stream():
+        d = doc.to_dict()
+        for f in fields:
+            value = d.get(f, 0)
+            totals[f] += value
+            by_day[d["date"]][f] += value
+            by_user[d.get("userId")][f] += value
+        for m, groups in breakdowns.items():
+            for key, group in (d.get(m) or {}).items():
+                for f, value in group.items():
+                    groups[key][f] += value
+        for outcome, n in (d.get("outcomes") or {}).items():
+            outcomes[outcome] += n
+
+    return {
+        "since": since,
+        "totals": _with_rates(totals),
+        "outcomes": dict(outcomes),
+        **{m: {k: _with_rates(v) for k, v in groups.items()} for m, groups in breakdowns.items()},
+        "byDay": {k: dict(v) for k, v in sorted(by_day.items())},
+        "byUser": sorted(
+            ({"userId": k, **v} for k, v in by_user.items()),
+            key=lambda u: u["costUsd"],
+            reverse=True,
+        ),
+    }
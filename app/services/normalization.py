@@ -1,4 +1,5 @@
 from difflib import get_close_matches
+from functools import lru_cache
 from app.constants.interests import STANDARD_INTERESTS
 
 SYNONYMS = {
@@ -15,6 +16,7 @@ SYNONYMS = {
     "machine learning": "technology",
 }
 
+@lru_cache(maxsize=2048)
 def normalize_topic(gpt_topic: str, fallback: str = "general") -> str:
     """
     Normalize GPT topic into one of the STANDARD_INTERESTS.
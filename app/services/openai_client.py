@@ -0,0 +1,97 @@
+import os
+import time
+import random
+import httpx
+import openai
+from openai import OpenAI
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Point OPENAI_BASE_URL at a local stub server to test without the real API
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None
+CONNECT_TIMEOUT = float(os.getenv("OPENAI_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT = float(os.getenv("OPENAI_READ_TIMEOUT", "60"))
+MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "20"))
+KEEPALIVE_EXPIRY = float(os.getenv("OPENAI_KEEPALIVE_EXPIRY", "120"))
+MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "3"))
+BACKOFF_BASE = 0.5   # seconds
+BACKOFF_MAX = 8.0
+
+# Transient failures worth another attempt (timeouts subclass APIConnectionError)
+RETRYABLE_ERRORS = (
+    openai.APIConnectionError,
+    openai.RateLimitError,
+    openai.InternalServerError,
+)
+
+_client: OpenAI = None
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def create_client() -> OpenAI:
+    """
+    Build an OpenAI client on a pooled, keep-alive httpx session so TLS
+    handshakes are paid once per connection instead of once per request.
+    """
+    http_client = httpx.Client(
+        http2=_http2_available(),
+        limits=httpx.Limits(
+            max_connections=MAX_CONNECTIONS,
+            max_keepalive_connections=MAX_CONNECTIONS,
+            keepalive_expiry=KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+    )
+    return OpenAI(
+        api_key=os.getenv("OPENAI_API_KEY"),
+        base_url=OPENAI_BASE_URL,
+        http_client=http_client,
+        max_retries=0,   # retries are handled by chat_completion below
+    )
+
+
+def init_client() -> OpenAI:
+    """Create the application-scoped client (called from the app lifespan)."""
+    global _client
+    _client = create_client()
+    return _client
+
+
+def close_client():
+    global _client
+    if _client is not None:
+        _client.close()
+        _client = None
+
+
+def get_client() -> OpenAI:
+    # Lazily create for scripts / workers that run outside the app lifespan
+    if _client is None:
+        return init_client()
+    return _client
+
+
+def chat_completion(**kwargs):
+    """
+    Call chat.completions.create on the shared client, retrying transient
+    errors with full-jitter exponential backoff.
+    """
+    client = get_client()
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            return client.chat.completions.create(**kwargs)
+        except RETRYABLE_ERRORS as e:
+            if attempt == MAX_RETRIES:
+                raise
+            delay = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+            print(f"⚠️ OpenAI call failed ({type(e).__name__}), retrying in {delay:.2f}s")
+            time.sleep(delay)
@@ -0,0 +1,87 @@
+import os
+from collections import Counter
+from datetime import datetime
+
+from google.cloud import firestore
+
+from app.firebase.firebase_config import db
+from app.firebase.queries import build_query
+from app.utils.batcher import BatchWriter
+from app.services.cache import game_cache
+
+# Reports needed before a game is auto-flagged and pulled from play
+REPORT_FLAG_THRESHOLD = int(os.getenv("REPORT_FLAG_THRESHOLD", "3"))
+# Each report costs 2 writes (report + counter); Firestore batches cap at 500
+REPORT_BATCH_SIZE = 200
+
+
+def report_doc_id(game_id: str, user_id: str) -> str:
+    # One report per user per game: repeats overwrite it instead of adding to the count
+    return f"{game_id}_{user_id}"
+
+
+def _flush_reports(reports: list):
+    """
+    Write a batch of reports in one commit and bump per-game counters in
+    `report_counts/{gameId}` by the number of distinct new reporters.
+    Games that cross the threshold get flagged both on their counter doc
+    and on the game itself.
+    """
+    latest = {r["id"]: r for r in reports}   # a user's repeat in the same batch keeps the last one
+    refs = [db.collection("reports").document(rid) for rid in latest]
+    existing = {snap.id for snap in db.get_all(refs) if snap.exists}
+    per_game = Counter(r["gameId"] for rid, r in latest.items() if rid not in existing)
+
+    batch = db.batch()
+    for ref in refs:
+        batch.set(ref, latest[ref.id])
+    for game_id, n in per_game.items():
+        batch.set(
+            db.collection("report_counts").document(game_id),
+            {"gameId": game_id, "count": firestore.Increment(n), "lastReportedAt": datetime.utcnow().isoformat()},
+            merge=True,
+        )
+    batch.commit()
+
+    # Only the games touched by this batch are re-read (all of them, so a
+    # retried flush still flags games whose first attempt failed midway)
+    touched = {r["gameId"] for r in latest.values()}
+    counter_refs = [db.collection("report_counts").document(g) for g in touched]
+    newly_flagged = [
+        snap.id for snap in db.get_all(counter_refs)
+        if snap.exists
+        and snap.get("count") >= REPORT_FLAG_THRESHOLD
+        and not (snap.to_dict() or {}).get("flagged")
+    ]
+    if not newly_flagged:
+        return
+
+    flagged_at = datetime.utcnow().isoformat()
+    game_refs = [db.collection("games").document(g) for g in newly_flagged]
+    batch = db.batch()
+    for snap in db.get_all(game_refs):
+        if snap.exists:
+            batch.update(snap.reference, {"flagged": True, "flaggedAt": flagged_at})
+    for game_id in newly_flagged:
+        batch.set(
+            db.collection("report_counts").document(game_id),
+            {"flagged": True, "flaggedAt": flagged_at},
+            merge=True,
+        )
+    batch.commit()
+    for game_id in newly_flagged:
+        game_cache.invalidate(game_id)
+    print("🚩 Auto-flagged games:", newly_flagged)
+
+
+report_writer = BatchWriter("reports", _flush_reports, max_batch=REPORT_BATCH_SIZE)
+
+
+def enqueue_report(report_data: dict):
+    report_writer.put(report_data)
+
+
+def list_flagged_games(limit: int = 100) -> list:
+    """Flagged games with their report counts, without scanning `games`."""
+    q = build_query("flagged_report_counts", flagged=True).limit(limit).stream()
+    return [doc.to_dict() for doc in q]
@@ -0,0 +1,120 @@
+import time
+from bisect import bisect_left, bisect_right
+
+from google.cloud import firestore
+
+from app.firebase.firebase_config import db
+
+DAY = 60 * 60 * 24
+DEFAULT_EASE = 2.5
+MIN_EASE = 1.3
+# SM-2 answer quality (0-5) for a binary right / wrong answer
+QUALITY_CORRECT = 4
+QUALITY_WRONG = 1
+
+
+# ---------------------------
+# SM-2 scheduling
+# ---------------------------
+def sm2(ease: float, interval: int, reps: int, quality: int):
+    """Return the next (ease, interval_days, reps) for one review."""
+    if quality < 3:
+        reps, interval = 0, 1
+    else:
+        reps += 1
+        if reps == 1:
+            interval = 1
+        elif reps == 2:
+            interval = 6
+        else:
+            interval = round(interval * ease)
+    ease = max(MIN_EASE, ease + (0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02)))
+    return round(ease, 3), interval, reps
+
+
+# ---------------------------
+# Sorted queue document
+# ---------------------------
+# users/{id}/review/queue holds the whole queue in one compact doc:
+#   due:     [epoch seconds, ...]   ascending
+#   gameIds: [gameId, ...]          aligned with due
+#   cards:   {gameId: [ease, intervalDays, reps, due, folderId]}
+# so "what's due" is one read plus a binary search, with no progress or game scans.
+def _queue_ref(user_id: str):
+    return db.collection("users").document(user_id).collection("review").document("queue")
+
+
+def _remove(due: list, game_ids: list, game_id: str, when: int):
+    i = bisect_left(due, when)
+    while i < len(due) and due[i] == when:
+        if game_ids[i] == game_id:
+            del due[i]
+            del game_ids[i]
+            return
+        i += 1
+
+
+def _insert(due: list, game_ids: list, game_id: str, when: int):
+    i = bisect_right(due, when)
+    due.insert(i, when)
+    game_ids.insert(i, game_id)
+
+
+def _update_queue(user_id: str, mutate):
+    """
+    Read, change and write the queue doc in one transaction so concurrent
+    answers (other games, other workers) don't overwrite each other.
+    `mutate(due, game_ids, cards)` edits the lists in place; returning False skips the write.
+    """
+    ref = _queue_ref(user_id)
+
+    @firestore.transactional
+    def run(transaction):
+        doc = ref.get(transaction=transaction)
+        queue = doc.to_dict() if doc.exists else {}
+        due, game_ids, cards = queue.get("due", []), queue.get("gameIds", []), queue.get("cards", {})
+        if mutate(due, game_ids, cards) is not False:
+            transaction.set(ref, {"due": due, "gameIds": game_ids, "cards": cards})
+
+    run(db.transaction())
+
+
+def record_review(user_id: str, folder_id: str, game_id: str, correct: bool, now: float = None):
+    """Reschedule one game after an answer and persist the queue."""
+    now = int(now or time.time())
+
+    def reschedule(due, game_ids, cards):
+        ease, interval, reps, when, _ = cards.get(game_id, [DEFAULT_EASE, 0, 0, None, folder_id])
+        if when is not None:
+            _remove(due, game_ids, game_id, when)
+
+        ease, interval, reps = sm2(ease, interval, reps, QUALITY_CORRECT if correct else QUALITY_WRONG)
+        when = now + interval * DAY
+        cards[game_id] = [ease, interval, reps, when, folder_id]
+        _insert(due, game_ids, game_id, when)
+
+    _update_queue(user_id, reschedule)
+
+
+def forget_games(user_id: str, game_ids: list):
+    """Drop games from the queue (deleted, or flagged and no longer served)."""
+    def drop(due, ids, cards):
+        removed = False
+        for game_id in game_ids:
+            card = cards.pop(game_id, None)
+            if card is not None:
+                _remove(due, ids, game_id, card[3])
+                removed = True
+        return removed
+
+    _update_queue(user_id, drop)
+
+
+def due_games(user_id: str, n: int, now: float = None):
+    """Return (ids of up to n due games, most overdue first; total due count)."""
+    doc = _queue_ref(user_id).get()
+    if not doc.exists:
+        return [], 0
+    queue = doc.to_dict()
+    count = bisect_right(queue.get("due", []), now or time.time())
+    return queue.get("gameIds", [])[:min(n, count)], count
@@ -1,4 +1,7 @@
 import os
+import time
+import threading
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
@@ -7,14 +10,17 @@ from passlib.context import CryptContext
 from dotenv import load_dotenv
 
 from app.models.user_model import User
-from app.firebase.firebase_config import db
+from app.services.cache import get_user_doc
 
 # 🔐 Load secrets from .env
 load_dotenv()
 
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 60*24
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "15"))
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "30"))
+VERIFIED_TOKEN_CACHE_SIZE = 10000
+ADMIN_EMAILS = {e.strip().lower() for e in os.getenv("ADMIN_EMAILS", "").split(",") if e.strip()}
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/users/login")
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -27,40 +33,111 @@ def hash_password(password: str) -> str:
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
-# ✅ FUNCTION: Create access token
-def create_access_token(data: dict, expires_delta: timedelta = None):
-    to_encode = data.copy()
-    expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
-    to_encode.update({"exp": expire})
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+# ✅ FUNCTION: Create tokens
+# Claims are kept minimal: sub (user id), exp, tv (the user's token version).
+# Bumping users/{id}.tokenVersion revokes every token issued before it.
+def _encode(claims: dict, expires_delta: timedelta) -> str:
+    claims = {**claims, "exp": datetime.utcnow() + expires_delta}
+    return jwt.encode(claims, SECRET_KEY, algorithm=ALGORITHM)
 
-# ✅ FUNCTION: Get current user from token
-def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
-    print("🔑 Received token:", token)  # Add this line
 
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
+def create_access_token(user_id: str, token_version: int = 0, expires_delta: timedelta = None):
+    return _encode(
+        {"sub": user_id, "tv": token_version},
+        expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES),
     )
 
+
+def create_refresh_token(user_id: str, token_version: int = 0):
+    return _encode(
+        {"sub": user_id, "tv": token_version, "typ": "refresh"},
+        timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
+    )
+
+
+def create_token_pair(user_id: str, token_version: int = 0) -> dict:
+    return {
+        "access_token": create_access_token(user_id, token_version),
+        "refresh_token": create_refresh_token(user_id, token_version),
+        "token_type": "bearer",
+        "expires_in": ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+    }
+
+
+# ✅ FUNCTION: Verify a token, memoizing the signature check until it expires
+_verified_lock = threading.Lock()
+_verified: "OrderedDict[str, dict]" = OrderedDict()   # token -> claims
+
+
+def decode_token(token: str) -> dict:
+    now = time.time()
+    with _verified_lock:
+        claims = _verified.get(token)
+        if claims is not None:
+            if claims["exp"] > now:
+                _verified.move_to_end(token)
+                return claims
+            del _verified[token]
+
+    claims = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])   # raises JWTError
+
+    with _verified_lock:
+        _verified[token] = claims
+        while len(_verified) > VERIFIED_TOKEN_CACHE_SIZE:
+            _verified.popitem(last=False)
+    return claims
+
+
+def _user_for_claims(claims: dict, token_type: str) -> dict:
+    """Resolve token claims to the user dict, enforcing token type and version."""
+    user_id = claims.get("sub")
+    if user_id is None or claims.get("typ", "access") != token_type:
+        raise JWTError("Wrong token type or missing 'sub'")
+
+    # Cached per worker; invalidated across workers when the user doc changes
+    user_data = get_user_doc(user_id)
+    if user_data is None:
+        raise JWTError(f"No such user in Firebase: {user_id}")
+    if claims.get("tv", 0) != user_data.get("tokenVersion", 0):
+        raise JWTError("Token revoked")
+    return user_data
+
+
+# ✅ FUNCTION: Get current user from token
+def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        print("✅ Payload decoded:", payload)  # Add this line
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            print("❌ Missing 'sub' in token")
-            raise credentials_exception
+        user_data = _user_for_claims(decode_token(token), "access")
     except JWTError as e:
         print("❌ JWTError:", e)
-        raise credentials_exception
-
-    user_doc = db.collection("users").document(user_id).get()
-    if not user_doc.exists:
-        print("❌ No such user in Firebase:", user_id)
-        raise credentials_exception
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+        )
 
-    print("✅ User authenticated:", user_id)
-    user_data = user_doc.to_dict()
-    user_data["id"] = user_id
     return User(**user_data)
 
+
+# ✅ FUNCTION: Exchange a refresh token for a new token pair
+def refresh_tokens(refresh_token: str) -> dict:
+    try:
+        user_data = _user_for_claims(decode_token(refresh_token), "refresh")
+    except JWTError as e:
+        print("❌ Refresh failed:", e)
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid refresh token",
+        )
+    return create_token_pair(user_data["id"], user_data.get("tokenVersion", 0))
+
+# ✅ FUNCTION: Restrict a route to admins (ADMIN_EMAILS in .env)
+def require_admin(current_user: User = Depends(get_current_user)) -> User:
+    if current_user.email.lower() not in ADMIN_EMAILS:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+    return current_user
+
+
+# ✅ FUNCTION: Same rule as GET /games/{id}: the owner, or anyone for unflagged random trivia
+def can_view_game(game: dict, user_id: str) -> bool:
+    if game.get("createdBy") == user_id:
+        return True
+    return game.get("folderId") == "random" and not game.get("flagged")
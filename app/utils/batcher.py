@@ -0,0 +1,86 @@
+import time
+import queue
+import threading
+from typing import Callable, List
+
+# Attempts per batch before it is dropped, with exponential backoff in between
+FLUSH_ATTEMPTS = 4
+FLUSH_BACKOFF_SECONDS = 0.5
+
+
+class BatchWriter:
+    """
+    In-process queue drained by a background thread that hands items to
+    `flush_fn` in batches of up to `max_batch`. Items wait at most `interval`
+    seconds for their batch to fill.
+    A failing flush is retried with backoff (so `flush_fn` must be safe to
+    repeat); only after FLUSH_ATTEMPTS failures is the batch logged and
+    dropped so the queue keeps moving.
+    """
+
+    def __init__(self, name: str, flush_fn: Callable[[List], None], max_batch: int = 200, interval: float = 2.0):
+        self.name = name
+        self.flush_fn = flush_fn
+        self.max_batch = max_batch
+        self.interval = interval
+        self._queue: "queue.Queue" = queue.Queue()
+        self._stop = threading.Event()
+        self._thread: threading.Thread = None
+
+    def put(self, item):
+        self._queue.put(item)
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=f"{self.name}-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the thread and flush whatever is still queued."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        while not self._queue.empty():
+            self._flush(self._collect(deadline=None))
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                first = self._queue.get(timeout=self.interval)
+            except queue.Empty:
+                continue
+            self._flush([first] + self._collect(deadline=time.monotonic() + self.interval, size=1))
+
+    def _collect(self, deadline, size: int = 0) -> List:
+        # deadline=None → take only what is already queued
+        batch = []
+        while size + len(batch) < self.max_batch:
+            try:
+                if deadline is None:
+                    batch.append(self._queue.get_nowait())
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _flush(self, batch: List):
+        if not batch:
+            return
+        for attempt in range(1, FLUSH_ATTEMPTS + 1):
+            try:
+                self.flush_fn(batch)
+                return
+            except Exception as e:
+                if attempt == FLUSH_ATTEMPTS:
+                    print(f"❌ {self.name} flush failed ({len(batch)} items dropped):", e)
+                    return
+                delay = FLUSH_BACKOFF_SECONDS * 2 ** (attempt - 1)
+                print(f"⚠️ {self.name} flush failed, retrying in {delay}s:", e)
+                time.sleep(delay)
@@ -0,0 +1,120 @@
+import os
+import mmap
+import time
+import struct
+import tempfile
+import threading
+import zlib
+from collections import OrderedDict
+
+try:
+    import fcntl
+except ImportError:   # Windows dev machines run a single process; no sharing needed
+    fcntl = None
+
+# ---------------------------
+# Cross-worker invalidation bus
+# ---------------------------
+# A small shared-memory file of generation counters. Every cache key hashes
+# to one slot; bumping the slot tells every worker process that its local
+# copy of any key in that slot is stale. Collisions only cause extra misses.
+CACHE_BUS_SLOTS = 4096
+_SLOT = struct.Struct("Q")
+_DEFAULT_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+CACHE_BUS_PATH = os.getenv("CACHE_BUS_PATH", os.path.join(_DEFAULT_DIR, "sapius-cache-bus"))
+
+
+class CacheBus:
+    def __init__(self, path: str = CACHE_BUS_PATH, slots: int = CACHE_BUS_SLOTS):
+        self.path = path
+        self.slots = slots
+        size = slots * _SLOT.size
+        self._lock = threading.Lock()
+        if fcntl is None:
+            self._fd = None
+            self._map = bytearray(size)
+            return
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        if os.fstat(self._fd).st_size < size:
+            os.ftruncate(self._fd, size)
+        self._map = mmap.mmap(self._fd, size)
+
+    def _offset(self, namespace: str, key: str) -> int:
+        return (zlib.crc32(f"{namespace}:{key}".encode()) % self.slots) * _SLOT.size
+
+    def generation(self, namespace: str, key: str) -> int:
+        return _SLOT.unpack_from(self._map, self._offset(namespace, key))[0]
+
+    def bump(self, namespace: str, key: str):
+        offset = self._offset(namespace, key)
+        with self._lock:
+            if self._fd is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                current = _SLOT.unpack_from(self._map, offset)[0]
+                _SLOT.pack_into(self._map, offset, current + 1)
+            finally:
+                if self._fd is not None:
+                    fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+
+cache_bus = CacheBus()
+
+
+# ---------------------------
+# Process-local cache
+# ---------------------------
+class SharedTTLCache:
+    """
+    Process-local LRU + TTL cache whose entries are dropped in every worker
+    when `invalidate(key)` is called in any of them.
+    """
+
+    def __init__(self, namespace: str, ttl_seconds: float, maxsize: int = 10000, bus: CacheBus = cache_bus):
+        self.namespace = namespace
+        self.ttl = ttl_seconds
+        self.maxsize = maxsize
+        self.bus = bus
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()   # key -> (value, expires, generation)
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires, generation = entry
+            if expires < time.monotonic() or generation != self.bus.generation(self.namespace, key):
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def generation(self, key: str) -> int:
+        return self.bus.generation(self.namespace, key)
+
+    def get_or_load(self, key: str, loader):
+        """Return the cached value or call loader(key); None results are not cached."""
+        value = self.get(key)
+        if value is not None:
+            return value
+        # Read the generation first so an invalidation during the load wins
+        generation = self.generation(key)
+        value = loader(key)
+        if value is not None:
+            self.set(key, value, generation)
+        return value
+
+    def set(self, key: str, value, generation: int = None):
+        if generation is None:
+            generation = self.generation(key)
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl, generation)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key: str):
+        self.bus.bump(self.namespace, key)
+        with self._lock:
+            self._entries.pop(key, None)
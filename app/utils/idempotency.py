@@ -0,0 +1,173 @@
+import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional
+
+import orjson
+from google.api_core.exceptions import AlreadyExists, FailedPrecondition, NotFound
+
+from app.firebase.firebase_config import db
+from app.utils.serialization import dumps
+
+# How long a finished response is replayed for a repeated Idempotency-Key
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", str(60 * 60 * 24)))
+IDEMPOTENCY_MAX_KEYS = int(os.getenv("IDEMPOTENCY_MAX_KEYS", "10000"))
+# How long a worker may hold a key without renewing it before others assume it
+# died and take over; the holder renews it every third of that while it runs
+IDEMPOTENCY_LEASE_SECONDS = int(os.getenv("IDEMPOTENCY_LEASE_SECONDS", "60"))
+IDEMPOTENCY_POLL_SECONDS = 0.5
+
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+
+
+class _InFlight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error: Optional[BaseException] = None
+
+
+class IdempotencyStore:
+    """
+    TTL store for Idempotency-Key handling, shared by all worker processes.
+    - A repeated key returns the stored result without running the handler.
+    - Duplicates that arrive while the first call is still running wait for
+      it and share its result, so only one execution happens.
+    Failed calls are not stored, so the client can retry them.
+
+    Keys live in Firestore `idempotency/{sha256(key)}`: the first worker
+    claims a key with create(), others poll the doc until it holds the
+    result. Within one process duplicates wait on an event instead, and
+    finished results are kept in a local LRU to skip the read.
+    Set a Firestore TTL policy on `expiresAt` to clean up old docs.
+    """
+
+    def __init__(self, ttl_seconds: int = IDEMPOTENCY_TTL_SECONDS, max_keys: int = IDEMPOTENCY_MAX_KEYS,
+                 lease_seconds: int = IDEMPOTENCY_LEASE_SECONDS, collection: str = "idempotency"):
+        self.ttl = ttl_seconds
+        self.max_keys = max_keys
+        self.lease = lease_seconds
+        self.collection = collection
+        self._lock = threading.Lock()
+        self._results: "OrderedDict[str, tuple[float, object]]" = OrderedDict()
+        self._in_flight: dict[str, _InFlight] = {}
+
+    def _evict(self, now: float):
+        # Constant TTL → insertion order is expiry order
+        while self._results:
+            key, (expires, _) = next(iter(self._results.items()))
+            if expires > now and len(self._results) <= self.max_keys:
+                break
+            self._results.popitem(last=False)
+
+    def run(self, key: Optional[str], fn: Callable):
+        if key is None:
+            return fn()
+
+        with self._lock:
+            now = time.monotonic()
+            self._evict(now)
+            cached = self._results.get(key)
+            if cached is not None:
+                print("♻️ Idempotent replay:", key)
+                return cached[1]
+            flight = self._in_flight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._in_flight[key] = _InFlight()
+
+        if not leader:
+            print("⏳ Waiting on in-flight request:", key)
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = self._run_shared(key, fn)
+            with self._lock:
+                self._results[key] = (time.monotonic() + self.ttl, flight.value)
+            return flight.value
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            flight.done.set()
+
+    def _run_shared(self, key: str, fn: Callable):
+        ref = db.collection(self.collection).document(hashlib.sha256(key.encode()).hexdigest())
+        waiting = False
+        while True:
+            now = datetime.now(timezone.utc)
+            try:
+                ref.create({
+                    "status": STATUS_RUNNING,
+                    "leaseUntil": now + timedelta(seconds=self.lease),
+                    "expiresAt": now + timedelta(seconds=self.ttl),
+                })
+                break
+            except AlreadyExists:
+                pass
+
+            snap = ref.get()
+            if not snap.exists:
+                continue
+            entry = snap.to_dict()
+            if entry["status"] == STATUS_DONE and entry["expiresAt"] > now:
+                print("♻️ Idempotent replay (shared):", key)
+                return orjson.loads(entry["result"])
+            if entry["status"] == STATUS_DONE or entry["leaseUntil"] < now:
+                # Expired result, or a worker died mid-call: take the key over
+                try:
+                    ref.delete(option=db.write_option(last_update_time=snap.update_time))
+                except (FailedPrecondition, NotFound):
+                    pass
+                continue
+            if not waiting:
+                waiting = True
+                print("⏳ Waiting on in-flight request in another worker:", key)
+            time.sleep(IDEMPOTENCY_POLL_SECONDS)
+
+        stop_renewing = threading.Event()
+        threading.Thread(target=self._renew_lease, args=(ref, key, stop_renewing), daemon=True).start()
+        try:
+            value = fn()
+        except BaseException:
+            # Release the key so the client (or a waiting worker) can retry
+            try:
+                ref.delete()
+            except Exception as e:
+                print("⚠️ Could not release idempotency key (lease will expire):", key, e)
+            raise
+        finally:
+            stop_renewing.set()
+        # Stored as the JSON the client received, so replays match it exactly
+        try:
+            ref.update({"status": STATUS_DONE, "result": dumps(value)})
+        except Exception as e:
+            print("⚠️ Could not store idempotent result:", key, e)
+        return value
+
+    def _renew_lease(self, ref, key: str, stop: threading.Event):
+        # Generation can outlast any fixed lease (retries, follow-ups, dedup refills)
+        while not stop.wait(self.lease / 3):
+            try:
+                ref.update({"leaseUntil": datetime.now(timezone.utc) + timedelta(seconds=self.lease)})
+            except Exception as e:
+                print("⚠️ Could not renew idempotency lease:", key, e)
+
+
+idempotency_store = IdempotencyStore()
+
+
+def scoped_key(user_id: str, scope: str, idempotency_key: Optional[str]) -> Optional[str]:
+    """Namespace a client key by user and endpoint so keys can't collide across them."""
+    if not idempotency_key:
+        return None
+    return f"{user_id}:{scope}:{idempotency_key}"
@@ -0,0 +1,61 @@
+from datetime import datetime
+from typing import Any
+
+import orjson
+from fastapi.responses import ORJSONResponse
+
+
+# ---------------------------
+# Timestamp normalization
+# ---------------------------
+def to_iso(value: Any, default: str = None):
+    """
+    Normalize a Firestore timestamp, datetime or {"_seconds": ...} dict to an
+    ISO string. Strings pass through untouched.
+    """
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    if isinstance(value, dict) and value.get("_seconds"):
+        return datetime.fromtimestamp(value["_seconds"]).isoformat()
+    if value is None:
+        return default
+    return value
+
+
+def to_datetime(value: Any):
+    """Inverse of to_iso, for models that declare createdAt as datetime."""
+    if hasattr(value, "to_datetime"):
+        return value.to_datetime()
+    if isinstance(value, str):
+        return datetime.fromisoformat(value)
+    return value
+
+
+def _default(obj: Any):
+    # Same output as the .isoformat() calls the routes used to do by hand
+    if hasattr(obj, "isoformat"):
+        return obj.isoformat()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(
+        content,
+        default=_default,
+        option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME,
+    )
+
+
+# ---------------------------
+# Response class
+# ---------------------------
+class AppJSONResponse(ORJSONResponse):
+    """
+    orjson-backed response. Datetimes (including Firestore's
+    DatetimeWithNanoseconds) are serialized with isoformat() here, once,
+    so routes can return raw Firestore dicts.
+    Returning this class directly from a route also skips jsonable_encoder.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,9 @@
+from uvicorn.workers import UvicornWorker
+
+
+class AppUvicornWorker(UvicornWorker):
+    """
+    gunicorn worker running uvicorn on uvloop + httptools.
+    gunicorn's `keepalive` setting is passed through as uvicorn's timeout_keep_alive.
+    """
+    CONFIG_KWARGS = {"loop": "uvloop", "http": "httptools", "lifespan": "on"}
@@ -0,0 +1,25 @@
+# Production server profile: gunicorn -c gunicorn.conf.py app.main:app
+import os
+import multiprocessing
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+
+# One worker per core: bcrypt and JSON work hold the GIL, so processes are what scale
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "app.workers.AppUvicornWorker"
+
+# Longer than typical load-balancer idle timeouts (60s) so the LB closes first
+keepalive = int(os.getenv("KEEPALIVE", "75"))
+# LLM generation can take a while, including follow-up calls
+timeout = int(os.getenv("WORKER_TIMEOUT", "180"))
+graceful_timeout = 30
+
+# Recycle workers now and then to cap memory growth of process-local caches
+max_requests = int(os.getenv("MAX_REQUESTS", "5000"))
+max_requests_jitter = 500
+
+# Firebase / gRPC clients are not fork-safe: each worker imports the app itself
+preload_app = False
+
+accesslog = "-"
+errorlog = "-"
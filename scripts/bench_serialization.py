@@ -0,0 +1,72 @@
+"""
+Benchmark: serialize a folder with 100 games the old way (jsonable_encoder +
+JSONResponse) vs AppJSONResponse, and compare bytes on the wire.
+
+Run from the repo root:  python -m scripts.bench_serialization
+"""
+import gzip
+import timeit
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+import brotli
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.utils.serialization import AppJSONResponse
+
+GAMES = 100
+ROUNDS = 200
+
+
+def build_payload():
+    now = datetime.utcnow()
+    folder_id = str(uuid4())
+    games = []
+    for i in range(GAMES):
+        games.append({
+            "id": str(uuid4()),
+            "order": i + 1,
+            "title": f"Question number {i} about history"[:30],
+            "question": f"Question number {i} about history and the events around it?",
+            "options": [f"Option {c} for question {i}" for c in "ABCD"],
+            "correctAnswer": f"Option A for question {i}",
+            "explanation": "A short explanation of why option A is the right answer. " * 2,
+            "createdAt": now - timedelta(minutes=i),
+            "createdBy": "user-123",
+            "folderId": folder_id,
+            "topic": "History",
+            "tags": ["history"],
+            "difficulty": "same",
+        })
+    folder = {
+        "id": folder_id,
+        "title": "History",
+        "description": "AI-generated quiz on History",
+        "prompt": "History",
+        "createdBy": "user-123",
+        "createdAt": now,
+        "gameIds": [g["id"] for g in games],
+    }
+    return {"folder": folder, "games": games}
+
+
+def main():
+    payload = build_payload()
+
+    old = lambda: JSONResponse(jsonable_encoder(payload)).body
+    new = lambda: AppJSONResponse(payload).body
+
+    body = new()
+    print(f"Payload: folder + {GAMES} games")
+    for name, fn in (("jsonable_encoder + json", old), ("AppJSONResponse (orjson)", new)):
+        seconds = timeit.timeit(fn, number=ROUNDS) / ROUNDS
+        print(f"  {name:<26} {seconds * 1000:8.3f} ms/response")
+
+    print(f"  {'raw bytes':<26} {len(body):8d}")
+    print(f"  {'gzip bytes':<26} {len(gzip.compress(body, compresslevel=6)):8d}")
+    print(f"  {'brotli bytes (q=4)':<26} {len(brotli.compress(body, quality=4)):8d}")
+
+
+if __name__ == "__main__":
+    main()
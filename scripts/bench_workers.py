@@ -0,0 +1,83 @@
+"""
+Benchmark: throughput of the production server profile as the worker count grows.
+
+Starts `gunicorn -c gunicorn.conf.py app.main:app` with 1, 2, 4, ... workers
+(up to the core count), hammers one endpoint with concurrent keep-alive
+connections and prints requests/second for each run.
+
+Run from the repo root:  python -m scripts.bench_workers --path /
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import subprocess
+import multiprocessing
+
+import httpx
+
+
+def worker_counts(max_workers: int):
+    n = 1
+    while n < max_workers:
+        yield n
+        n *= 2
+    yield max_workers
+
+
+def wait_ready(url: str, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(url, timeout=1)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError(f"server at {url} did not start")
+
+
+async def hammer(url: str, concurrency: int, seconds: float) -> int:
+    done = 0
+    deadline = time.monotonic() + seconds
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(limits=limits, timeout=30) as client:
+        async def loop():
+            nonlocal done
+            while time.monotonic() < deadline:
+                await client.get(url)
+                done += 1
+
+        await asyncio.gather(*(loop() for _ in range(concurrency)))
+    return done
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--path", default="/")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--max-workers", type=int, default=multiprocessing.cpu_count())
+    args = parser.parse_args()
+
+    base = f"http://127.0.0.1:{args.port}"
+    print(f"{'workers':>8} {'req/s':>10}")
+    for workers in worker_counts(args.max_workers):
+        env = {**os.environ, "WEB_CONCURRENCY": str(workers), "PORT": str(args.port)}
+        server = subprocess.Popen(
+            [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "--access-logfile", "/dev/null", "app.main:app"],
+            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            wait_ready(base + "/")
+            count = asyncio.run(hammer(base + args.path, args.concurrency, args.seconds))
+            print(f"{workers:>8} {count / args.seconds:>10.1f}")
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Generate and check firestore.indexes.json from the query registry
+(app/firebase/queries.py).
+
+    python -m scripts.firestore_indexes generate   # write the manifest
+    python -m scripts.firestore_indexes check      # CI: fail if the manifest is stale
+    python -m scripts.firestore_indexes check --live
+
+--live runs every registered query (with its sample values) against the
+Firestore emulator (FIRESTORE_EMULATOR_HOST) or the configured project. It
+fails when a query needs a missing index or is served by a full collection
+scan, and reports documents read per query.
+"""
+import sys
+import json
+import argparse
+
+from google.api_core.exceptions import FailedPrecondition, GoogleAPICallError
+
+from app.firebase.queries import QUERIES, MANIFEST_PATH, build_query, index_manifest, missing_indexes
+
+SAMPLE_DEFAULT = "__index_check__"
+
+
+def generate():
+    with open(MANIFEST_PATH, "w") as f:
+        json.dump(index_manifest(), f, indent=2)
+        f.write("\n")
+    print(f"✅ Wrote {len(index_manifest()['indexes'])} composite index(es) to firestore.indexes.json")
+
+
+def check_static() -> bool:
+    missing = missing_indexes()
+    for index in missing:
+        print("❌ Missing from firestore.indexes.json:", json.dumps(index))
+    return not missing
+
+
+def _explain(query):
+    from google.cloud.firestore_v1.query_profile import ExplainOptions
+
+    results = query.get(explain_options=ExplainOptions(analyze=True))
+    metrics = results.get_explain_metrics()
+    stats = metrics.execution_stats
+    indexes = [i.get("properties", "") for i in metrics.plan_summary.indexes_used]
+    return stats.results_returned, stats.read_operations, indexes
+
+
+def check_live() -> bool:
+    ok = True
+    print(f"{'query':<26} {'results':>8} {'reads':>8}  index")
+    for spec in QUERIES.values():
+        values = {f: spec.sample.get(f, SAMPLE_DEFAULT) for f, _ in spec.filters}
+        query = build_query(spec.name, **values)
+        try:
+            returned, reads, indexes = _explain(query)
+        except FailedPrecondition as e:
+            print(f"❌ {spec.name}: needs an index ({e.message})")
+            ok = False
+            continue
+        except (GoogleAPICallError, AttributeError, TypeError):
+            # The emulator does not implement query explain: count what a plain read returns
+            returned = reads = len(query.get())
+            indexes = ["(emulator: plan unavailable)"]
+
+        # Only the __name__ index behind a filtered query means a collection scan
+        full_scan = spec.filters and indexes and all(i.strip("() ") == "__name__ ASC" for i in indexes)
+        if full_scan:
+            print(f"❌ {spec.name}: served by a full collection scan")
+            ok = False
+        print(f"{spec.name:<26} {returned:>8} {reads:>8}  {', '.join(indexes)}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("command", choices=["generate", "check"])
+    parser.add_argument("--live", action="store_true")
+    args = parser.parse_args()
+
+    if args.command == "generate":
+        generate()
+        return
+
+    ok = check_static()
+    if args.live:
+        ok = check_live() and ok
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()